@@ -0,0 +1,99 @@
+"""
+Smoke check: smart_cut clips against the segments render mode.
+
+smart_cut splices stream-copied GOPs between re-encoded boundary pieces,
+joined as MPEG-TS and remuxed into an MP4 with a single avcC, so the
+result has to be checked by decoding it.  This cuts the same segments
+with both modes and compares their duration and decoded frame count, and
+requires the smart_cut clip to decode without errors:
+
+    python experiments/smart_cut_smoke.py [source_video]
+
+Without a source it synthesizes an H.264/AAC MPEG-TS test file whose
+container start_time is 1.4 s, the case where keyframe timestamps and -ss
+positions count from different origins.  Requires ffmpeg and ffprobe.
+
+Exits with status 1 on the first mismatch.
+"""
+
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scripts.video_clipper import RENDER_MODE_SEGMENTS, RENDER_MODE_SMART_CUT, clip_video_segments
+
+# Segments cut from the source: each straddles keyframes (GOP = 2 s below)
+SEGMENTS = [(1.3, 7.7), (12.25, 15.9), (20.0, 26.5)]
+
+# Allowed difference per segment between the two modes
+FRAME_TOLERANCE = 1
+DURATION_TOLERANCE = 0.05
+
+
+def make_source(path: Path) -> None:
+    """30 s of 25 fps test video and a sine tone, GOP 2 s, starting at 1.4 s."""
+    subprocess.run([
+        "ffmpeg", "-y", "-v", "error",
+        "-f", "lavfi", "-i", "testsrc2=size=640x360:rate=25:duration=30",
+        "-f", "lavfi", "-i", "sine=frequency=440:sample_rate=48000:duration=30",
+        "-c:v", "libx264", "-profile:v", "high", "-pix_fmt", "yuv420p", "-g", "50",
+        "-c:a", "aac",
+        "-output_ts_offset", "1.4",
+        str(path),
+    ], check=True)
+
+
+def probe(path: Path) -> dict:
+    """Duration, decoded video frame count and decoder errors of a clip."""
+    duration = subprocess.run(
+        ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", str(path)],
+        check=True, capture_output=True, text=True,
+    ).stdout.strip()
+    frames = subprocess.run(
+        ["ffprobe", "-v", "error", "-count_frames", "-select_streams", "v:0",
+         "-show_entries", "stream=nb_read_frames", "-of", "csv=p=0", str(path)],
+        check=True, capture_output=True, text=True,
+    ).stdout.strip()
+    errors = subprocess.run(
+        ["ffmpeg", "-v", "error", "-i", str(path), "-f", "null", "-"],
+        capture_output=True, text=True,
+    ).stderr.strip()
+    return {"duration": float(duration), "frames": int(frames), "errors": errors}
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        if len(sys.argv) > 1:
+            source = Path(sys.argv[1])
+        else:
+            source = tmp / "source.ts"
+            make_source(source)
+
+        results = {}
+        for mode in (RENDER_MODE_SEGMENTS, RENDER_MODE_SMART_CUT):
+            clip = clip_video_segments(str(source), SEGMENTS, str(tmp / f"{mode}.mp4"), render_mode=mode)
+            results[mode] = probe(clip)
+            print(f"{mode}: {results[mode]['duration']:.3f}s, {results[mode]['frames']} frames")
+
+    reference, smart = results[RENDER_MODE_SEGMENTS], results[RENDER_MODE_SMART_CUT]
+    failures = []
+    if smart["errors"]:
+        failures.append(f"smart_cut clip decodes with errors:\n{smart['errors']}")
+    if abs(smart["frames"] - reference["frames"]) > FRAME_TOLERANCE * len(SEGMENTS):
+        failures.append(f"frame count {smart['frames']} != {reference['frames']}")
+    if abs(smart["duration"] - reference["duration"]) > DURATION_TOLERANCE * len(SEGMENTS):
+        failures.append(f"duration {smart['duration']:.3f}s != {reference['duration']:.3f}s")
+
+    if failures:
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("smart_cut matches the segments mode and decodes cleanly")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Regression check: indexed word matching against the brute-force scan.
+
+match_phrase_to_words prunes the windows it scores with a TranscriptIndex,
+whether one is passed in or built for the call; pruning must never change
+the result.  This replays the original full-scan matcher on random
+transcripts with typos, punctuation and near-duplicate words, and compares
+every phrase's match, with and without a shared index, and through the
+multi-set sweep of match_phrase_sets_to_words:
+
+    python experiments/word_matcher_equivalence.py [n_trials]
+
+Exits with status 1 on the first divergence.
+"""
+
+import contextlib
+import io
+import random
+import sys
+from difflib import SequenceMatcher
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scripts.word_matcher import TranscriptIndex, match_phrase_sets_to_words, match_phrase_to_words
+
+VOCAB = [
+    "time", "tim", "times", "world", "worlds", "hello", "these", "tese", "them", "then",
+    "what", "look", "each", "to", "find", "a", "an", "and", "the", "they", "there",
+]
+PUNCTUATION = ["", "", "", ",", ".", "?", "!"]
+
+
+def brute_force_match(phrase: str, words: list[dict], threshold: float = 0.8):
+    """The original full-scan matcher, kept verbatim as the reference."""
+    phrase_clean = phrase.strip().lower()
+    phrase_words = phrase_clean.split()
+    if not phrase_words or not words:
+        return None
+
+    best_match, best_score = None, 0.0
+    for i in range(len(words) - len(phrase_words) + 1):
+        window_words = words[i:i + len(phrase_words)]
+        window_lowered = [w["text"].lower() for w in window_words]
+        if _words_match(phrase_words, window_lowered):
+            similarity = SequenceMatcher(None, phrase_clean, " ".join(window_lowered)).ratio()
+            if similarity > best_score:
+                best_score = similarity
+                best_match = (window_words[0]["start"], window_words[-1]["end"], " ".join(w["text"] for w in window_words))
+    if best_match and best_score >= threshold:
+        return best_match
+
+    best_match, best_score = None, 0.0
+    for window_size in range(len(phrase_words), min(len(phrase_words) + 5, len(words) + 1)):
+        for i in range(len(words) - window_size + 1):
+            window_words = words[i:i + window_size]
+            window_lowered = [w["text"].lower() for w in window_words]
+            overlap_ratio = _overlap_ratio(phrase_words, window_lowered)
+            similarity = SequenceMatcher(None, phrase_clean, " ".join(window_lowered)).ratio()
+            combined_score = (overlap_ratio * 0.7) + (similarity * 0.3)
+            if combined_score > best_score:
+                best_score = combined_score
+                best_match = (window_words[0]["start"], window_words[-1]["end"], " ".join(w["text"] for w in window_words))
+    if best_match and best_score >= threshold:
+        return best_match
+    return None
+
+
+def _similar(a: str, b: str) -> bool:
+    return SequenceMatcher(None, a, b).ratio() >= 0.85
+
+
+def _words_match(phrase_words: list[str], window_words: list[str]) -> bool:
+    matches = sum(p == w or _similar(p, w) for p, w in zip(phrase_words, window_words))
+    return matches >= len(phrase_words) * 0.8
+
+
+def _overlap_ratio(phrase_words: list[str], window_words: list[str]) -> float:
+    phrase_set, window_set = set(phrase_words), set(window_words)
+    matches = sum(p in window_set or any(_similar(p, w) for w in window_set) for p in phrase_set)
+    return matches / len(phrase_set)
+
+
+def _match_as_set(phrase: str, words: list[dict], threshold: float, index: TranscriptIndex):
+    """The phrase's match through match_phrase_sets_to_words (None if unmatched)."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        matches = match_phrase_sets_to_words([[phrase]], words, threshold, index=index)[0]
+    return matches[0] if matches else None
+
+
+def make_words(rng: random.Random, n_words: int) -> list[dict]:
+    words, t = [], 0.0
+    for _ in range(n_words):
+        text = rng.choice(VOCAB) + rng.choice(PUNCTUATION)
+        if rng.random() < 0.2:
+            text = text.capitalize()
+        words.append({"text": text, "start": round(t, 3), "end": round(t + 0.3, 3), "confidence": 0.9})
+        t += 0.35
+    return words
+
+
+def make_phrase(rng: random.Random, words: list[dict]) -> str:
+    length = rng.randint(1, 10)
+    start = rng.randrange(max(1, len(words) - length + 1))
+    tokens = [w["text"] for w in words[start:start + length]]
+    for k in range(len(tokens)):
+        roll = rng.random()
+        if roll < 0.15:
+            tokens[k] = rng.choice(VOCAB)
+        elif roll < 0.3:
+            tokens[k] = tokens[k].strip(",.?!")
+    return " ".join(tokens)
+
+
+def main():
+    n_trials = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    rng = random.Random(0)
+    for trial in range(n_trials):
+        words = make_words(rng, rng.randint(5, 60))
+        index = TranscriptIndex(words)
+        phrase = make_phrase(rng, words)
+        threshold = rng.choice([0.5, 0.6, 0.8])
+
+        expected = brute_force_match(phrase, words, threshold)
+        for label, got in (
+            ("shared index", match_phrase_to_words(phrase, words, threshold, index=index)),
+            ("no index", match_phrase_to_words(phrase, words, threshold)),
+            ("phrase sets", _match_as_set(phrase, words, threshold, index)),
+        ):
+            if got != expected:
+                print(f"trial {trial} ({label}): {phrase!r} (threshold {threshold})")
+                print(f"  transcript: {' '.join(w['text'] for w in words)}")
+                print(f"  expected {expected}")
+                print(f"  got      {got}")
+                sys.exit(1)
+    print(f"{n_trials} phrases matched identically to the full scan")
+
+
+if __name__ == "__main__":
+    main()
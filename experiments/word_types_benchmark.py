@@ -0,0 +1,92 @@
+"""
+Memory and speed of the transcript word representations.
+
+Compares a JSON-style list of word dicts with a list of slotted Word records
+and the columnar WordTable, on a synthetic transcript:
+
+    python experiments/word_types_benchmark.py [n_words]
+"""
+
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scripts.subtitle_generator import generate_ass
+from scripts.transcript_store import Word, WordTable
+from scripts.word_matcher import TranscriptIndex, match_phrases_to_words
+
+
+def make_words(n_words: int) -> list[dict]:
+    rng = random.Random(0)
+    vocab = [f"word{i}" for i in range(5000)]
+    words, t = [], 0.0
+    for _ in range(n_words):
+        duration = rng.uniform(0.1, 0.5)
+        words.append({
+            "text": rng.choice(vocab),
+            "start": round(t, 3),
+            "end": round(t + duration, 3),
+            "confidence": round(rng.random(), 4),
+        })
+        t += duration + 0.05
+    return words
+
+
+def measure_memory(build) -> tuple[object, int]:
+    tracemalloc.start()
+    value = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return value, size
+
+
+def best_of(fn, repeat: int = 5) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    n_words = int(sys.argv[1]) if len(sys.argv) > 1 else 25_000
+    words = make_words(n_words)
+    rng = random.Random(1)
+    phrases = [
+        " ".join(w["text"] for w in words[i:i + 12])
+        for i in rng.sample(range(n_words - 12), 20)
+    ]
+    clips = [(words[i]["start"], words[i + 80]["end"]) for i in rng.sample(range(n_words - 80), 20)]
+
+    # Copies are built under tracemalloc so each representation is counted in full
+    dicts, dict_bytes = measure_memory(lambda: [dict(w) for w in words])
+    records, record_bytes = measure_memory(lambda: [Word.from_dict(w) for w in words])
+    table, table_bytes = measure_memory(lambda: WordTable.from_dicts(words))
+    print(f"{n_words} words")
+    print(f"  memory  list[dict] {dict_bytes / 1e6:7.2f} MB")
+    print(f"          list[Word] {record_bytes / 1e6:7.2f} MB")
+    print(f"          WordTable  {table_bytes / 1e6:7.2f} MB")
+
+    for label, data in (("list[dict]", dicts), ("WordTable", table)):
+        index_s = best_of(lambda: TranscriptIndex(data))
+        index = TranscriptIndex(data)
+        match_s = best_of(lambda: match_phrases_to_words(phrases, data, index=index), repeat=3)
+        with tempfile.TemporaryDirectory() as tmp:
+            ass_s = best_of(lambda: [
+                generate_ass(data, start, end, Path(tmp) / f"{i}.ass")
+                for i, (start, end) in enumerate(clips)
+            ])
+        print(
+            f"  {label:10s} index {index_s * 1000:7.1f} ms   match x{len(phrases)} {match_s * 1000:7.1f} ms"
+            f"   captions x{len(clips)} {ass_s * 1000:7.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
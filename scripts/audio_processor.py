@@ -1,7 +1,52 @@
+import re
 import subprocess
 import os
+import hashlib
+import logging
 from pathlib import Path
 
+try:
+    from cache_store import CacheStore
+except ImportError:
+    # Fallback for when running as module
+    from scripts.cache_store import CacheStore
+
+logger = logging.getLogger(__name__)
+
+# Size budget of the content-addressed audio cache (least recently used
+# WAVs are evicted past this)
+AUDIO_CACHE_MAX_BYTES = int(os.getenv("AUDIO_CACHE_MAX_BYTES", 5 * 1024 ** 3))
+
+# fast_file_hash reads this many evenly spaced blocks of this size
+_HASH_BLOCKS = 16
+_HASH_BLOCK_SIZE = 1024 * 1024
+
+
+# ffmpeg output options for the 16kHz mono PCM WAV the pipeline transcribes
+_EXTRACT_OPTIONS = [
+    "-vn",          # No video
+    "-sn",          # No subtitles
+    "-dn",          # No data
+    "-ac", "1",
+    "-ar", "16000",
+    "-acodec", "pcm_s16le",
+    "-f", "wav",
+]
+
+
+def _ffmpeg_extract(video_path: Path, output_audio: Path) -> None:
+    """Runs ffmpeg to write 16kHz mono PCM WAV audio for *video_path*."""
+    command = [
+        "ffmpeg",
+        "-y",
+        "-i", str(video_path),
+        *_EXTRACT_OPTIONS,
+        str(output_audio)
+    ]
+
+    subprocess.run(command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
 def extract_audio(video_path: str, output_dir="audio") -> Path:
     """
     Extracts audio from a video file using ffmpeg and saves it as a WAV file.
@@ -13,30 +58,451 @@ def extract_audio(video_path: str, output_dir="audio") -> Path:
     Path(output_dir).mkdir(parents=True, exist_ok=True)
     output_audio = Path(output_dir) / (video_path_obj.stem + ".wav")
 
+    _ffmpeg_extract(video_path_obj, output_audio)
+    return output_audio
+
+
+def fast_file_hash(filepath: str | Path) -> str:
+    """
+    Content hash of a (potentially multi-GB) file without reading all of it.
+
+    Hashes the file size together with _HASH_BLOCKS evenly spaced blocks
+    (always including the first and last), so identical uploads share a key
+    regardless of their filename.  Files smaller than the sampled total are
+    hashed in full.
+    """
+    size = os.path.getsize(filepath)
+    hasher = hashlib.blake2b(digest_size=20)
+    hasher.update(size.to_bytes(8, "little"))
+
+    with open(filepath, "rb") as f:
+        if size <= _HASH_BLOCKS * _HASH_BLOCK_SIZE:
+            for chunk in iter(lambda: f.read(_HASH_BLOCK_SIZE), b""):
+                hasher.update(chunk)
+        else:
+            stride = (size - _HASH_BLOCK_SIZE) // (_HASH_BLOCKS - 1)
+            for block in range(_HASH_BLOCKS):
+                f.seek(block * stride)
+                hasher.update(f.read(_HASH_BLOCK_SIZE))
+
+    return hasher.hexdigest()
+
+
+def source_cache_key(filepath: str | Path) -> str:
+    """
+    Cache key of a source video: fast_file_hash plus its mtime.
+
+    Sampled blocks alone are too weak to identify content (two edits of the
+    same length can differ only between samples), so the key also changes
+    whenever the file is rewritten.  Moved or mtime-preserving copies keep
+    their key.
+    """
+    mtime_ns = os.stat(filepath).st_mtime_ns
+    hasher = hashlib.blake2b(digest_size=20)
+    hasher.update(fast_file_hash(filepath).encode())
+    hasher.update(mtime_ns.to_bytes(8, "little", signed=True))
+    return hasher.hexdigest()
+
+
+def get_extracted_audio(
+    video_path: str,
+    output_dir: str = "audio",
+    cache_dir: str | None = None,
+    max_cache_bytes: int = AUDIO_CACHE_MAX_BYTES,
+) -> Path:
+    """
+    Gets the path to the extracted audio file, extracting it if it doesn't exist.
+
+    Audio is cached by the content of the source video (see
+    source_cache_key), so re-running a video skips ffmpeg entirely, and two
+    different files with the same name never collide.  The cache is safe to
+    share between concurrent jobs: extraction for one video is serialized
+    by a lock file and published with an atomic rename (see CacheStore).
+
+    Args:
+        video_path: Path to the source video.
+        output_dir: Directory for extracted audio, used as the cache when
+                    *cache_dir* is not given.
+        cache_dir: Optional shared cache directory that outlives a job.
+        max_cache_bytes: Least recently used WAVs in *cache_dir* are evicted
+                         past this size.  Audio cached in *output_dir* is
+                         never evicted.
+
+    Returns:
+        Path to the cached WAV file.
+    """
+    video_path_obj = Path(video_path)
+    if not video_path_obj.exists():
+        raise FileNotFoundError(f"Video file not found: {video_path}")
+
+    store = CacheStore(cache_dir or output_dir, max_bytes=max_cache_bytes)
+    key = source_cache_key(video_path_obj)
+    entry = f"{key}.wav"
+    output_audio = store.path(entry)
+
+    if store.touch(entry):
+        logger.info(f"Using cached audio for {video_path_obj.name}")
+        return output_audio
+
+    with store.lock(key):
+        # Another job may have extracted it while we waited for the lock
+        if store.touch(entry):
+            return output_audio
+
+        tmp_path = store.temp_path(key)
+        try:
+            _ffmpeg_extract(video_path_obj, tmp_path)
+            os.replace(tmp_path, output_audio)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    if cache_dir is not None:
+        store.evict(keep=entry)
+    return output_audio
+
+
+def publish_extracted_audio(
+    video_path: str | Path,
+    extracted_audio: str | Path,
+    cache_dir: str | Path,
+    max_cache_bytes: int = AUDIO_CACHE_MAX_BYTES,
+) -> Path:
+    """
+    Adopts audio extracted elsewhere (e.g. PipedAudioExtraction) into the cache.
+
+    *extracted_audio* must be a WAV produced with the same settings as
+    get_extracted_audio and live in *cache_dir*, so it can be renamed into
+    place.  If the video is already cached, the new file is discarded.
+
+    Returns:
+        Path to the cached WAV file, as get_extracted_audio would return.
+    """
+    store = CacheStore(cache_dir, max_bytes=max_cache_bytes)
+    key = source_cache_key(video_path)
+    entry = f"{key}.wav"
+    output_audio = store.path(entry)
+
+    with store.lock(key):
+        if store.touch(entry):
+            os.remove(extracted_audio)
+        else:
+            os.replace(extracted_audio, output_audio)
+
+    store.evict(keep=entry)
+    return output_audio
+
+
+# ffmpeg output options for each codec AudioStream can produce
+STREAM_CODECS = {
+    "wav": ["-acodec", "pcm_s16le", "-f", "wav"],
+    "flac": ["-acodec", "flac", "-f", "flac"],
+    "opus": ["-acodec", "libopus", "-b:a", "32k", "-f", "ogg"],
+}
+
+# Block size AudioStream yields when iterated
+_STREAM_BLOCK_SIZE = 64 * 1024
+
+
+class AudioStream:
+    """
+    Read-only file object over ffmpeg's audio output for a video.
+
+    ffmpeg writes 16kHz mono audio to a pipe instead of a file.  Every byte
+    handed out by read() is fed to an MD5 hasher as it passes, and optionally
+    copied to *tee_path*, so the audio can be uploaded, hashed and (if
+    wanted) saved in a single pass.  Compressed codecs ("flac", "opus") cut
+    the bytes moved several-fold compared to "wav".
+
+    Iterating yields the audio in blocks, which is what HTTP clients such as
+    httpx (used by the AssemblyAI SDK) accept as a chunked request body; they
+    reject plain file-like objects.
+
+    Use as a context manager; on exit ffmpeg is reaped and a failed
+    extraction raises subprocess.CalledProcessError.
+
+    Args:
+        video_path: Path to the source video.
+        codec: One of STREAM_CODECS.
+        tee_path: Optional path to also write the audio bytes to.
+    """
+
+    def __init__(self, video_path: str | Path, codec: str = "flac", tee_path: str | Path | None = None):
+        if codec not in STREAM_CODECS:
+            raise ValueError(f"Unsupported stream codec: {codec!r} (expected one of {list(STREAM_CODECS)})")
+        video_path = Path(video_path)
+        if not video_path.exists():
+            raise FileNotFoundError(f"Video file not found: {video_path}")
+
+        self.codec = codec
+        self.name = f"{video_path.stem}.{codec}"
+        self.bytes_read = 0
+        self._hasher = hashlib.md5()
+        self._tee = open(tee_path, "wb") if tee_path else None
+        self._command = [
+            "ffmpeg",
+            "-i", str(video_path),
+            "-vn", "-sn", "-dn",
+            "-ac", "1",
+            "-ar", "16000",
+            *STREAM_CODECS[codec],
+            "pipe:1",
+        ]
+        self._process = subprocess.Popen(self._command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self._process.stdout.read(size)
+        if chunk:
+            self._hasher.update(chunk)
+            self.bytes_read += len(chunk)
+            if self._tee:
+                self._tee.write(chunk)
+        return chunk
+
+    def __iter__(self):
+        while chunk := self.read(_STREAM_BLOCK_SIZE):
+            yield chunk
+
+    def readable(self) -> bool:
+        return True
+
+    def hexdigest(self) -> str:
+        """MD5 of every byte read so far (the whole audio once read() returned b"")."""
+        return self._hasher.hexdigest()
+
+    def close(self) -> None:
+        """Stops ffmpeg if still running and raises if it failed."""
+        if self._tee:
+            self._tee.close()
+            self._tee = None
+        if self._process.stdout.closed:
+            return
+        # Anything left unread means the consumer stopped early
+        finished = self._process.stdout.read(1) == b""
+        self._process.stdout.close()
+        if not finished:
+            self._process.kill()
+        returncode = self._process.wait()
+        if finished and returncode != 0:
+            raise subprocess.CalledProcessError(returncode, self._command)
+
+    def __enter__(self) -> "AudioStream":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+            return
+        try:
+            self.close()
+        except subprocess.CalledProcessError:
+            pass
+
+
+# silencedetect settings used to find chunk boundaries
+_SILENCE_NOISE_DB = -35
+_SILENCE_MIN_SECONDS = 0.4
+
+# A chunk boundary may move at most this fraction of the chunk length to
+# land on a silence
+_SPLIT_SEARCH_FRACTION = 0.25
+
+_SILENCE_RE = re.compile(r"silence_(start|end): (-?[\d.]+)")
+
+
+def probe_duration(media_path: str | Path) -> float:
+    """Duration of a media file in seconds, via ffprobe."""
+    output = subprocess.run(
+        [
+            "ffprobe", "-v", "error",
+            "-show_entries", "format=duration",
+            "-of", "default=noprint_wrappers=1:nokey=1",
+            str(media_path),
+        ],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return float(output.strip())
+
+
+def detect_silences(
+    audio_path: str | Path,
+    noise_db: float = _SILENCE_NOISE_DB,
+    min_seconds: float = _SILENCE_MIN_SECONDS,
+) -> list[tuple[float, float]]:
+    """
+    Finds silent stretches in an audio file with ffmpeg's silencedetect.
+
+    Returns:
+        list of (start, end) times in seconds; a silence running to the end
+        of the file has end == inf.
+    """
+    stderr = subprocess.run(
+        [
+            "ffmpeg", "-i", str(audio_path),
+            "-af", f"silencedetect=noise={noise_db}dB:d={min_seconds}",
+            "-f", "null", "-",
+        ],
+        check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+    ).stderr
+
+    silences = []
+    start = None
+    for kind, value in _SILENCE_RE.findall(stderr):
+        if kind == "start":
+            start = max(0.0, float(value))
+        elif start is not None:
+            silences.append((start, float(value)))
+            start = None
+    if start is not None:
+        silences.append((start, float("inf")))
+    return silences
+
+
+def plan_chunks(
+    duration: float,
+    silences: list[tuple[float, float]],
+    n_chunks: int,
+) -> list[tuple[float, float]]:
+    """
+    Splits [0, duration] into about *n_chunks* spans cut in the middle of silences.
+
+    Each cut starts at an even split point and moves to the midpoint of the
+    closest silence within _SPLIT_SEARCH_FRACTION of a chunk length, so words
+    are not cut in half.  Where no silence is close enough the even split is
+    kept.
+
+    Returns:
+        list of (start, end) times in seconds covering the whole duration.
+    """
+    n_chunks = max(1, n_chunks)
+    chunk_length = duration / n_chunks
+    window = chunk_length * _SPLIT_SEARCH_FRACTION
+    midpoints = [(s + min(e, duration)) / 2 for s, e in silences]
+
+    cuts = []
+    for k in range(1, n_chunks):
+        target = k * chunk_length
+        nearby = [m for m in midpoints if abs(m - target) <= window]
+        cut = min(nearby, key=lambda m: abs(m - target)) if nearby else target
+        if cut > (cuts[-1] if cuts else 0.0) and cut < duration:
+            cuts.append(cut)
+
+    bounds = [0.0, *cuts, duration]
+    return list(zip(bounds, bounds[1:]))
+
+
+def extract_audio_chunk(audio_path: str | Path, start: float, end: float, output_audio: str | Path) -> Path:
+    """Writes [start, end) of *audio_path* to *output_audio* as 16kHz mono PCM WAV."""
     command = [
         "ffmpeg",
         "-y",
-        "-i", str(video_path_obj),
-        "-vn",          # No video
-        "-sn",          # No subtitles
-        "-dn",          # No data
+        "-ss", f"{start:.3f}",
+        "-i", str(audio_path),
+        "-t", f"{end - start:.3f}",
+        "-vn", "-sn", "-dn",
         "-ac", "1",
         "-ar", "16000",
         "-acodec", "pcm_s16le",
-        str(output_audio)
+        "-f", "wav",
+        str(output_audio),
     ]
-
     subprocess.run(command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-    return output_audio
+    return Path(output_audio)
+
+
+# Top-level ISO-BMFF (MP4/MOV) box types that can precede moov/mdat
+_MP4_BOXES = {b"ftyp", b"styp", b"moov", b"mdat", b"free", b"skip", b"wide", b"pdin", b"uuid", b"meta"}
 
-def get_extracted_audio(video_path: str, output_dir: str = "audio") -> Path:
+
+def pipe_streamable(head: bytes) -> bool | None:
     """
-    Gets the path to the extracted audio file, extracting it if it doesn't exist.
+    Whether ffmpeg can demux a video from a pipe, judging by its first bytes.
+
+    MP4/MOV files are only readable from a non-seekable pipe when the moov
+    box comes before mdat ("fast start").  Other containers (MKV/WebM, MPEG-TS,
+    ...) are assumed streamable; if ffmpeg disagrees the caller falls back
+    to extracting from the finished file.
+
+    Returns:
+        True or False, or None if more bytes are needed to decide.
     """
-    video_path_obj = Path(video_path)
-    output_audio = Path(output_dir) / (video_path_obj.stem + ".wav")
-    
-    if output_audio.exists():
-        return output_audio
-    
-    return extract_audio(video_path, output_dir)
+    if len(head) < 8:
+        return None
+    if bytes(head[4:8]) not in _MP4_BOXES:
+        return True
+
+    offset = 0
+    while offset + 8 <= len(head):
+        size = int.from_bytes(head[offset:offset + 4], "big")
+        box_type = bytes(head[offset + 4:offset + 8])
+        if box_type == b"moov":
+            return True
+        if box_type == b"mdat":
+            return False
+        if size == 1:
+            if offset + 16 > len(head):
+                return None
+            size = int.from_bytes(head[offset + 8:offset + 16], "big")
+        if size < 8:
+            # Box runs to end of file (0) or is malformed: no moov ahead of the media
+            return False
+        offset += size
+    return None
+
+
+class PipedAudioExtraction:
+    """
+    ffmpeg extracting WAV audio from video bytes written to its stdin.
+
+    Lets extraction run while a video is still being received: write()
+    every chunk as it arrives, then finish().  If ffmpeg cannot demux the
+    stream it stops reading; write() then returns False and finish()
+    returns None, so the caller can fall back to get_extracted_audio.
+
+    Args:
+        output_audio: Where to write the 16kHz mono PCM WAV.
+    """
+
+    def __init__(self, output_audio: str | Path):
+        self.output_audio = Path(output_audio)
+        self.failed = False
+        self._process = subprocess.Popen(
+            ["ffmpeg", "-y", "-i", "pipe:0", *_EXTRACT_OPTIONS, str(self.output_audio)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+    def write(self, chunk: bytes) -> bool:
+        """Feeds *chunk* to ffmpeg; False once ffmpeg has given up."""
+        if self.failed:
+            return False
+        try:
+            self._process.stdin.write(chunk)
+            return True
+        except (BrokenPipeError, ValueError):
+            self.failed = True
+            return False
+
+    def finish(self) -> Path | None:
+        """Waits for ffmpeg; the WAV path on success, None (and no file) on failure."""
+        try:
+            self._process.stdin.close()
+        except BrokenPipeError:
+            self.failed = True
+        if self._process.wait() != 0:
+            self.failed = True
+        if self.failed:
+            self.output_audio.unlink(missing_ok=True)
+            return None
+        return self.output_audio
+
+    def abort(self) -> None:
+        """Stops ffmpeg and removes any partial output."""
+        self.failed = True
+        self._process.kill()
+        try:
+            self._process.stdin.close()
+        except BrokenPipeError:
+            pass
+        self._process.wait()
+        self.output_audio.unlink(missing_ok=True)
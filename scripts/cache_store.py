@@ -0,0 +1,201 @@
+"""
+Persistent cache tiers shared by every job on the host.
+
+A CacheStore is one directory of cache entries (files or directories, named
+by key) that outlives the jobs using it: extracted audio, transcriptions,
+phrase matches and LLM responses each live in their own store, separate from
+the per-job scratch directories that are deleted when a job ends.
+
+Stores are safe to share between threads and worker processes:
+
+- writers build an entry under a temporary name and rename it into place,
+  so readers never see a partial entry;
+- work on one key can be serialized with lock(), an flock on a sidecar
+  lock file, so parallel jobs wanting the same entry compute it once.
+  Lock files are never deleted, not even with their entry, since a new
+  file would let a second job lock the same key;
+- evict() drops entries unused for longer than the TTL, then the least
+  recently used ones until the store fits its size budget.  Reads refresh
+  an entry's mtime, which is what recency is measured by.  A sweep stats
+  the whole store, so it runs at most once per EVICTION_INTERVAL_SECONDS
+  (tracked by a stamp file shared by every process using the store).
+"""
+
+import os
+import json
+import time
+import fcntl
+import shutil
+import tempfile
+import logging
+from contextlib import contextmanager
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Default size budget of one store
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", 2 * 1024 ** 3))
+
+# Entries unused for this long are evicted whatever the store's size
+CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", 30 * 24 * 3600))
+
+# Entries used more recently than this are never evicted for size, so a job
+# that was just handed a path can still read it
+EVICTION_GRACE_SECONDS = 3600
+
+# Minimum time between two eviction sweeps of one store
+EVICTION_INTERVAL_SECONDS = int(os.getenv("EVICTION_INTERVAL_SECONDS", 300))
+
+# Lock files and in-progress writes; never treated as entries
+_LOCK_SUFFIX = ".lock"
+_TMP_SUFFIX = ".tmp"
+
+# Its mtime records when the store was last swept; never treated as an entry
+_EVICTION_STAMP = ".last_eviction"
+
+
+class CacheStore:
+    """
+    A directory of cache entries with size and TTL eviction.
+
+    Args:
+        root: Directory holding the entries (created if missing).
+        max_bytes: Least recently used entries are evicted past this size.
+        ttl_seconds: Entries unused for this long are evicted.
+    """
+
+    def __init__(
+        self,
+        root: str | Path,
+        max_bytes: int = CACHE_MAX_BYTES,
+        ttl_seconds: float = CACHE_TTL_SECONDS,
+    ):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+
+    def path(self, key: str) -> Path:
+        """Where the entry for *key* lives (whether or not it exists)."""
+        return self.root / key
+
+    @contextmanager
+    def lock(self, key: str):
+        """Serializes work on one entry across threads and processes."""
+        with open(self.root / f"{_lock_name(key)}{_LOCK_SUFFIX}", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+    def touch(self, key: str) -> bool:
+        """Marks an entry as recently used; False if it doesn't exist."""
+        try:
+            os.utime(self.path(key))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def temp_path(self, key: str, suffix: str = "") -> Path:
+        """A fresh file in the store to build *key* in before publishing it."""
+        fd, tmp_name = tempfile.mkstemp(dir=self.root, prefix=f"{key}.", suffix=f"{suffix}{_TMP_SUFFIX}")
+        os.close(fd)
+        return Path(tmp_name)
+
+    def get_json(self, key: str):
+        """The JSON entry for *key*, or None on a miss."""
+        if not self.touch(key):
+            return None
+        try:
+            with open(self.path(key), "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def put_json(self, key: str, value) -> None:
+        """Atomically writes a JSON entry for *key*, then evicts if needed."""
+        tmp_path = self.temp_path(key)
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(value, f)
+            os.replace(tmp_path, self.path(key))
+        finally:
+            tmp_path.unlink(missing_ok=True)
+        self.evict(keep=key)
+
+    def evict(self, keep: str | None = None, force: bool = False) -> int:
+        """
+        Drops expired entries, then least recently used ones past max_bytes.
+
+        Args:
+            keep: Key that is never evicted (typically the one just written).
+            force: Sweep even if the store was swept less than
+                   EVICTION_INTERVAL_SECONDS ago.
+
+        Returns:
+            Number of bytes freed.
+        """
+        now = time.time()
+        if not force and not self._claim_sweep(now):
+            return 0
+
+        entries = []
+        for path in self.root.iterdir():
+            if path.name.endswith((_LOCK_SUFFIX, _TMP_SUFFIX)) or path.name in (keep, _EVICTION_STAMP):
+                continue
+            try:
+                mtime = path.stat().st_mtime
+                size = _entry_size(path)
+            except FileNotFoundError:
+                continue
+            entries.append((mtime, size, path))
+
+        total = sum(size for _, size, _ in entries)
+        freed = 0
+        for mtime, size, path in sorted(entries):
+            expired = now - mtime > self.ttl_seconds
+            if not expired and (total <= self.max_bytes or now - mtime < EVICTION_GRACE_SECONDS):
+                continue
+            if self._remove(path):
+                total -= size
+                freed += size
+                reason = "expired" if expired else "over budget"
+                logger.info(f"Evicted cached {path.name} from {self.root.name} ({reason}, {size / 1024 / 1024:.1f} MB)")
+        return freed
+
+    def _claim_sweep(self, now: float) -> bool:
+        """True if no sweep happened in the last interval; the caller then owns this one."""
+        stamp = self.root / _EVICTION_STAMP
+        try:
+            if now - stamp.stat().st_mtime < EVICTION_INTERVAL_SECONDS:
+                return False
+        except FileNotFoundError:
+            pass
+        # Two processes may both get here; a duplicate sweep is only wasted work
+        stamp.touch()
+        os.utime(stamp, (now, now))
+        return True
+
+    def _remove(self, path: Path) -> bool:
+        try:
+            if path.is_dir():
+                # Rename first so readers never open a half-deleted directory
+                doomed = Path(tempfile.mkdtemp(dir=self.root, prefix=f"{path.name}.", suffix=_TMP_SUFFIX))
+                os.replace(path, doomed)
+                shutil.rmtree(doomed, ignore_errors=True)
+            else:
+                path.unlink()
+        except FileNotFoundError:
+            return False
+        # The entry's lock file stays: a process blocked in flock on it would
+        # otherwise wake up holding a lock nobody else can see
+        return True
+
+
+def _lock_name(key: str) -> str:
+    """Entries sharing a name up to the first dot share a lock (abc.wav -> abc)."""
+    return key.split(".", 1)[0]
+
+
+def _entry_size(path: Path) -> int:
+    if not path.is_dir():
+        return path.stat().st_size
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
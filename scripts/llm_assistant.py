@@ -1,5 +1,97 @@
 import asyncio
+import hashlib
 import json
+import os
+import re
+import logging
+
+import openai
+
+try:
+    from cache_store import CacheStore
+    from llm_client import create_chat_completion, get_client
+except ImportError:
+    # Fallback for when running as module
+    from scripts.cache_store import CacheStore
+    from scripts.llm_client import create_chat_completion, get_client
+
+logger = logging.getLogger(__name__)
+
+# Transcripts longer than this many tokens are split into windows for
+# map-reduce highlight extraction (0 sends every transcript as one prompt)
+HIGHLIGHT_WINDOW_TOKENS = int(os.getenv("HIGHLIGHT_WINDOW_TOKENS", 0))
+
+# Share of each window repeated at the start of the next, so moments that
+# straddle a window boundary are seen whole by one of them
+WINDOW_OVERLAP_RATIO = 0.1
+
+# Ask for several highlight sets of one prompt in a single request (the API's
+# n parameter) instead of one request per set; providers that reject n fall
+# back to parallel requests automatically
+LLM_N_COMPLETIONS = os.getenv("LLM_N_COMPLETIONS", "1") not in ("0", "false", "no")
+
+# Models seen rejecting the n parameter in this process
+_N_UNSUPPORTED_MODELS = set()
+
+# Error messages that blame the n parameter ("'n' is not supported", "n must be 1", ...)
+_N_PARAM_ERROR_RE = re.compile(r"""['"`]n['"`]|\bn\s*(?:=|must|is|should|only|parameter)|\bparameter\s+n\b""", re.IGNORECASE)
+
+# System message sent with every highlight request
+SYSTEM_MESSAGE = "You are a helpful assistant that outputs JSON."
+
+# Bump when the request sent for a prompt changes, to invalidate cached responses
+_RESPONSE_CACHE_VERSION = 1
+
+# Rough characters per token, used when tiktoken isn't installed
+_CHARS_PER_TOKEN = 4
+
+def token_count(text, encoding_name="cl100k_base"):
+    """Counts tokens with tiktoken, or estimates them if it isn't installed."""
+    try:
+        import tiktoken
+    except ImportError:
+        return -(-len(text) // _CHARS_PER_TOKEN)
+    return len(tiktoken.get_encoding(encoding_name).encode(text))
+
+def chunk_transcript(lines, max_tokens, overlap_tokens=None):
+    """
+    Splits transcript lines into token-budgeted windows on line boundaries.
+
+    Consecutive windows overlap by about *overlap_tokens* (default
+    WINDOW_OVERLAP_RATIO of the budget).  A single line longer than the
+    budget becomes a window of its own.
+
+    Args:
+        lines: Transcript lines (one per segment), in order.
+        max_tokens: Token budget of each window.
+        overlap_tokens: Tokens of context repeated between windows.
+
+    Returns:
+        list[str]: The windows' texts.
+    """
+    if overlap_tokens is None:
+        overlap_tokens = int(max_tokens * WINDOW_OVERLAP_RATIO)
+    counts = [token_count(line) for line in lines]
+
+    windows = []
+    start = 0
+    while start < len(lines):
+        end, tokens = start, 0
+        while end < len(lines) and (end == start or tokens + counts[end] <= max_tokens):
+            tokens += counts[end]
+            end += 1
+        windows.append("\n".join(lines[start:end]))
+        if end == len(lines):
+            break
+
+        # Step back over up to overlap_tokens of trailing lines, always
+        # moving forward by at least one line
+        next_start, overlap = end, 0
+        while next_start - 1 > start and overlap + counts[next_start - 1] <= overlap_tokens:
+            next_start -= 1
+            overlap += counts[next_start]
+        start = next_start
+    return windows
 
 def build_prompt(transcript_text):
     """Constructs the prompt for extracting key moments from the full transcript."""
@@ -26,35 +118,240 @@ Example:
 }}
 """
 
-async def ask_llm_async(prompt, client, model="gpt-4o-mini", temperature=0.7):
-    """Sends prompt to OpenAI Chat API asynchronously with JSON mode."""
-    response = await client.chat.completions.create(
-        model=model,
-        temperature=temperature,
-        response_format={"type": "json_object"},
-        messages=[
-            {"role": "system", "content": "You are a helpful assistant that outputs JSON."},
-            {"role": "user", "content": prompt}
-        ]
+def build_reduce_prompt(candidates):
+    """Constructs the prompt that ranks window highlights down to the final set."""
+    numbered = "\n".join(f"{i}. {candidate}" for i, candidate in enumerate(candidates, 1))
+    return f"""
+You are an expert video editor and content strategist. The candidate moments below were picked from different parts of one long video's transcript.
+
+Candidates:
+{numbered}
+
+Instructions:
+- Choose the 3-5 most engaging, interesting, and viral-worthy candidates.
+- Prefer distinct moments; skip candidates that repeat one another.
+- Answer with the candidates' numbers only, best first.
+
+Return the result as a JSON object with a 'highlights' key containing a list of numbers.
+Example:
+{{
+  "highlights": [4, 1, 9]
+}}
+"""
+
+async def ask_llm_async(prompt, client, model="gpt-4o-mini", temperature=0.7, sample=0,
+                        cache_dir=None, bypass_cache=False):
+    """
+    Sends prompt to OpenAI Chat API asynchronously with JSON mode.
+
+    Requests go through the process-wide rate limiter with retries (see
+    llm_client); *client* may be None to use the shared client.
+
+    With *cache_dir*, responses are cached on disk (see cache_store) keyed
+    by the prompt's hash, model, temperature and *sample*, so re-running
+    the same transcript costs no LLM calls.  Distinct sample indices give
+    repeated requests for one prompt (e.g. several highlight sets) their
+    own entries.  *bypass_cache* skips the lookup; the fresh response
+    still replaces the cached one.
+    """
+    answers = await ask_llm_samples_async(
+        prompt, client, [sample], model=model, temperature=temperature,
+        cache_dir=cache_dir, bypass_cache=bypass_cache, n_completions=False,
     )
-    content = response.choices[0].message.content
-    try:
-        return json.loads(content).get("highlights", [])
-    except json.JSONDecodeError:
-        print(f"Error decoding JSON from LLM: {content}")
-        return []
+    return answers[0]
+
+async def ask_llm_samples_async(prompt, client, samples, model="gpt-4o-mini", temperature=0.7,
+                                cache_dir=None, bypass_cache=False, n_completions=LLM_N_COMPLETIONS):
+    """
+    Gets one answer per sample index for the same prompt.
+
+    Samples missing from the cache (see ask_llm_async) are requested
+    together as the choices of a single request with the API's n
+    parameter, so the prompt is uploaded and billed once rather than once
+    per sample.  Without *n_completions*, for models that rejected n, and
+    for choices a provider didn't return, the samples are requested in
+    parallel instead.
 
-async def get_multiple_answers_async(prompt, client, n_answers=3, model="gpt-4o-mini", temperature=0.7):
+    Args:
+        prompt: The prompt every sample answers.
+        client: AsyncOpenAI client, or None for the shared client.
+        samples: Sample indices, one answer each.
+        model: OpenAI model to use.
+        temperature: LLM temperature.
+        cache_dir: Optional LLM response cache.
+        bypass_cache: Ignore cached responses for this call.
+        n_completions: Request the missing samples in one call using n.
+
+    Returns:
+        list: The parsed 'highlights' of each sample, in *samples* order.
     """
-    Calls the LLM n_answers times in parallel using asyncio.
+    messages = [
+        {"role": "system", "content": SYSTEM_MESSAGE},
+        {"role": "user", "content": prompt}
+    ]
+    store = CacheStore(cache_dir) if cache_dir is not None else None
+    keys = {sample: _response_cache_key(messages, model, temperature, sample) for sample in samples}
+    prompt_tokens = token_count(SYSTEM_MESSAGE) + token_count(prompt)
+    request = {
+        "model": model,
+        "temperature": temperature,
+        "response_format": {"type": "json_object"},
+        "messages": messages,
+    }
+
+    contents = {}
+    if store is not None and not bypass_cache:
+        for sample in samples:
+            cached = await asyncio.to_thread(store.get_json, keys[sample])
+            if cached is not None:
+                contents[sample] = cached["content"]
+    fresh = [sample for sample in samples if sample not in contents]
+    if fresh:
+        client = client or get_client()
+
+    missing = list(fresh)
+    if n_completions and len(missing) > 1 and model not in _N_UNSUPPORTED_MODELS:
+        try:
+            response = await create_chat_completion(client, prompt_tokens, n=len(missing), **request)
+        except openai.BadRequestError as e:
+            # Any other 400 (context length, JSON mode, ...) would fail the same way per sample
+            if not _rejects_n(e):
+                raise
+            logger.warning(f"{model} rejected n={len(missing)} ({e}); requesting samples in parallel")
+            _N_UNSUPPORTED_MODELS.add(model)
+        else:
+            choices = sorted(response.choices, key=lambda choice: getattr(choice, "index", 0))
+            for sample, choice in zip(missing, choices):
+                contents[sample] = choice.message.content
+            missing = missing[len(choices):]
+
+    if missing:
+        responses = await asyncio.gather(*(
+            create_chat_completion(client, prompt_tokens, **request) for _ in missing
+        ))
+        for sample, response in zip(missing, responses):
+            contents[sample] = response.choices[0].message.content
+
+    answers = []
+    for sample in samples:
+        content = contents[sample]
+        try:
+            answers.append(json.loads(content).get("highlights", []))
+        except json.JSONDecodeError:
+            print(f"Error decoding JSON from LLM: {content}")
+            answers.append([])
+            continue
+        # Only well-formed responses are cached, so a bad one is retried next time
+        if store is not None and sample in fresh:
+            await asyncio.to_thread(store.put_json, keys[sample], {"model": model, "content": content})
+    return answers
+
+def _rejects_n(error):
+    """Whether a 400 from the API is about the n parameter itself."""
+    if getattr(error, "param", None) == "n":
+        return True
+    code = getattr(error, "code", None)
+    message = getattr(error, "message", None) or str(error)
+    return any(text and _N_PARAM_ERROR_RE.search(str(text)) for text in (code, message))
+
+def _response_cache_key(messages, model, temperature, sample):
+    """Cache entry name for one chat request."""
+    hasher = hashlib.blake2b(digest_size=20)
+    hasher.update(json.dumps([_RESPONSE_CACHE_VERSION, model, temperature, sample, messages]).encode("utf-8"))
+    return f"{hasher.hexdigest()}.json"
+
+async def get_multiple_answers_async(prompt, client, n_answers=3, model="gpt-4o-mini", temperature=0.7,
+                                     cache_dir=None, bypass_cache=False, n_completions=LLM_N_COMPLETIONS):
     """
-    tasks = []
-    for i in range(n_answers):
-        tasks.append(ask_llm_async(prompt, client, model=model, temperature=temperature))
-    
-    print(f"  Generating {n_answers} highlight sets in parallel...")
-    results = await asyncio.gather(*tasks)
-    return results
+    Gets n_answers highlight sets for one prompt.
+
+    With *n_completions* they are requested as n choices of one request,
+    otherwise as n_answers parallel requests (see ask_llm_samples_async).
+    Each set has its own sample index, so with *cache_dir* (see
+    ask_llm_async) every set is cached separately.
+    """
+    mode = "in one request" if n_completions and n_answers > 1 else "in parallel"
+    print(f"  Generating {n_answers} highlight sets {mode}...")
+    return await ask_llm_samples_async(
+        prompt, client, list(range(n_answers)), model=model, temperature=temperature,
+        cache_dir=cache_dir, bypass_cache=bypass_cache, n_completions=n_completions,
+    )
+
+async def get_windowed_answers_async(lines, client, n_answers=1, model="gpt-4o-mini", temperature=0.7,
+                                     max_window_tokens=HIGHLIGHT_WINDOW_TOKENS, overlap_tokens=None,
+                                     cache_dir=None, bypass_cache=False):
+    """
+    Map-reduce highlight extraction for transcripts too long for one prompt.
+
+    Map: the transcript is split into token-budgeted windows (see
+    chunk_transcript) and every window is asked for its key moments
+    concurrently, so latency is bounded by the slowest window rather than
+    the whole transcript.  Reduce: the pooled candidates are ranked down to
+    3-5 highlights, once per requested set.  Highlights are always
+    candidates copied verbatim, so they still match the transcript.
+
+    Transcripts that fit in one window take the single-prompt path
+    (get_multiple_answers_async).
+
+    Args:
+        lines: Transcript lines (one per segment), in order.
+        client: AsyncOpenAI client.
+        n_answers: Number of highlight sets to produce.
+        model: OpenAI model to use.
+        temperature: LLM temperature for both passes.
+        max_window_tokens: Token budget of each window.
+        overlap_tokens: Tokens repeated between windows (see chunk_transcript).
+        cache_dir: Optional LLM response cache (see ask_llm_async).
+        bypass_cache: Ignore cached responses for this run.
+
+    Returns:
+        list[list[str]]: n_answers highlight sets.
+    """
+    windows = chunk_transcript(lines, max_window_tokens, overlap_tokens) if max_window_tokens > 0 else []
+    if len(windows) <= 1:
+        return await get_multiple_answers_async(
+            build_prompt("\n".join(lines)), client, n_answers=n_answers, model=model, temperature=temperature,
+            cache_dir=cache_dir, bypass_cache=bypass_cache,
+        )
+
+    print(f"  Extracting candidates from {len(windows)} transcript windows in parallel...")
+    window_answers = await asyncio.gather(*(
+        ask_llm_async(build_prompt(window), client, model=model, temperature=temperature,
+                      cache_dir=cache_dir, bypass_cache=bypass_cache)
+        for window in windows
+    ))
+
+    # Overlapping windows can both pick the same moment
+    candidates = []
+    seen = set()
+    for answer in window_answers:
+        for candidate in answer:
+            key = " ".join(str(candidate).lower().split())
+            if key and key not in seen:
+                seen.add(key)
+                candidates.append(str(candidate).strip())
+    if not candidates:
+        return [[] for _ in range(n_answers)]
+
+    print(f"  Ranking {len(candidates)} candidates into {n_answers} highlight set(s)...")
+    reduce_prompt = build_reduce_prompt(candidates)
+    rankings = await ask_llm_samples_async(
+        reduce_prompt, client, list(range(n_answers)), model=model, temperature=temperature,
+        cache_dir=cache_dir, bypass_cache=bypass_cache,
+    )
+    return [_pick_candidates(ranking, candidates) for ranking in rankings]
+
+def _pick_candidates(ranking, candidates):
+    """Maps the reduce pass's candidate numbers back to their text, ignoring invalid ones."""
+    picked = []
+    for number in ranking:
+        try:
+            index = int(number) - 1
+        except (TypeError, ValueError):
+            continue
+        if 0 <= index < len(candidates) and candidates[index] not in picked:
+            picked.append(candidates[index])
+    return picked
 
 # Keep synchronous versions for backward compatibility if needed, 
 # but they will just wrap the async ones for simplicity in this transition
@@ -0,0 +1,247 @@
+"""
+Shared OpenAI client and process-wide rate limiting for chat requests.
+
+Every highlight request in the process goes through create_chat_completion,
+which:
+
+- waits on a RateLimiter holding token buckets for requests per minute and
+  tokens per minute, so bursts from many jobs and highlight sets are spread
+  out instead of hitting the API at once;
+- adjusts those buckets from the x-ratelimit-* response headers, which
+  reflect the account's real limits and remaining quota (and so usage by
+  other processes too);
+- retries rate-limited, timed-out and server-error responses with jittered
+  exponential backoff, honouring Retry-After, and pauses every caller in the
+  process while the API is pushing back.
+
+get_client returns one pooled AsyncOpenAI client per event loop, so calls
+reuse connections instead of constructing a client per pipeline run.
+"""
+
+import os
+import time
+import random
+import asyncio
+import logging
+import threading
+import weakref
+
+import openai
+from openai import AsyncOpenAI
+
+logger = logging.getLogger(__name__)
+
+# Request and token budgets per minute for this process; refined from the
+# API's rate limit headers once responses arrive
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", 500))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", 200_000))
+
+# Attempts after the first for rate-limited or transient failures
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 6))
+
+# Backoff before retry k is uniform in [0, min(_BACKOFF_MAX, _BACKOFF_BASE * 2**k)]
+_BACKOFF_BASE_SECONDS = 1.0
+_BACKOFF_MAX_SECONDS = 60.0
+
+# Completion tokens reserved per request until the real usage is known
+_EXPECTED_COMPLETION_TOKENS = 1000
+
+# HTTP statuses worth retrying besides 429
+_RETRY_STATUSES = (408, 409, 500, 502, 503, 504)
+
+
+class TokenBucket:
+    """
+    Continuously refilling budget of *capacity* units per minute.
+
+    Args:
+        capacity: Units available per minute (also the burst size).
+    """
+
+    def __init__(self, capacity: float):
+        self.capacity = capacity
+        self.level = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.capacity / 60.0)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until *amount* units are available (0 if they are now)."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        return max(0.0, (amount - self.level) * 60.0 / self.capacity)
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self.level -= min(amount, self.capacity)
+
+    def give_back(self, amount: float) -> None:
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+    def update(self, capacity: float | None = None, remaining: float | None = None) -> None:
+        """Applies limits reported by the API."""
+        self._refill()
+        if capacity:
+            self.capacity = capacity
+        if remaining is not None:
+            self.level = min(self.level, remaining)
+
+
+class RateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute limiter shared by all callers.
+
+    Args:
+        requests_per_minute: Initial request budget.
+        tokens_per_minute: Initial token budget.
+    """
+
+    def __init__(self, requests_per_minute: int = LLM_REQUESTS_PER_MINUTE, tokens_per_minute: int = LLM_TOKENS_PER_MINUTE):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self._paused_until = 0.0
+        # Buckets are shared by every event loop and thread in the process
+        self._lock = threading.Lock()
+
+    async def acquire(self, tokens: int) -> None:
+        """Waits until one request of about *tokens* tokens fits both budgets."""
+        while True:
+            with self._lock:
+                wait = max(
+                    self._paused_until - time.monotonic(),
+                    self.requests.wait_time(1),
+                    self.tokens.wait_time(tokens),
+                )
+                if wait <= 0:
+                    self.requests.take(1)
+                    self.tokens.take(tokens)
+                    return
+            # Jitter so waiting callers don't all wake at the same instant
+            await asyncio.sleep(wait + random.uniform(0, 0.05))
+
+    def settle(self, reserved: int, used: int) -> None:
+        """Corrects the token budget once a request's real usage is known."""
+        with self._lock:
+            if used < reserved:
+                self.tokens.give_back(reserved - used)
+            else:
+                self.tokens.take(used - reserved)
+
+    def pause(self, seconds: float) -> None:
+        """Holds back every caller for *seconds* (e.g. after a 429)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def update_from_headers(self, headers) -> None:
+        """Adopts the limits and remaining quota from x-ratelimit-* headers."""
+        with self._lock:
+            self.requests.update(
+                _header_number(headers, "x-ratelimit-limit-requests"),
+                _header_number(headers, "x-ratelimit-remaining-requests"),
+            )
+            self.tokens.update(
+                _header_number(headers, "x-ratelimit-limit-tokens"),
+                _header_number(headers, "x-ratelimit-remaining-tokens"),
+            )
+
+
+# The process-wide limiter used by create_chat_completion
+rate_limiter = RateLimiter()
+
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict]" = weakref.WeakKeyDictionary()
+
+
+def get_client(api_key: str | None = None) -> AsyncOpenAI:
+    """
+    The shared AsyncOpenAI client for the running event loop.
+
+    Clients hold an HTTP connection pool bound to the loop they were first
+    used on, so one is kept per loop (and API key).  Retries are left to
+    create_chat_completion, which coordinates them across callers.
+
+    Args:
+        api_key: OpenAI API key (if None, reads from OPENAI_API_KEY env var)
+    """
+    api_key = api_key or os.getenv("OPENAI_API_KEY")
+    loop_clients = _clients.setdefault(asyncio.get_running_loop(), {})
+    if api_key not in loop_clients:
+        loop_clients[api_key] = AsyncOpenAI(api_key=api_key, max_retries=0)
+    return loop_clients[api_key]
+
+
+async def create_chat_completion(client, prompt_tokens: int, limiter: RateLimiter | None = None, **request):
+    """
+    client.chat.completions.create(**request) under the rate limiter, with retries.
+
+    Args:
+        client: AsyncOpenAI client (see get_client).
+        prompt_tokens: Estimated input tokens, reserved from the token budget
+                       together with _EXPECTED_COMPLETION_TOKENS.
+        limiter: RateLimiter to use (default: the process-wide one).
+        **request: Chat completion parameters.
+
+    Returns:
+        The chat completion.
+    """
+    limiter = limiter or rate_limiter
+    reserved = prompt_tokens + _EXPECTED_COMPLETION_TOKENS * request.get("n", 1)
+    completions = client.chat.completions
+
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        await limiter.acquire(reserved)
+        try:
+            if hasattr(completions, "with_raw_response"):
+                raw = await completions.with_raw_response.create(**request)
+                limiter.update_from_headers(raw.headers)
+                response = raw.parse()
+            else:
+                response = await completions.create(**request)
+        except Exception as e:
+            # The request may not have been processed; don't hold its tokens
+            limiter.settle(reserved, 0)
+            if attempt == LLM_MAX_RETRIES or not _is_retryable(e):
+                raise
+            retry_after = _retry_after(e)
+            delay = random.uniform(0, min(_BACKOFF_MAX_SECONDS, _BACKOFF_BASE_SECONDS * 2 ** attempt))
+            if isinstance(e, openai.RateLimitError):
+                # Everyone in the process backs off, not just this caller
+                limiter.pause(retry_after if retry_after is not None else delay)
+            logger.warning(
+                f"LLM request failed ({type(e).__name__}), retry {attempt + 1}/{LLM_MAX_RETRIES} "
+                f"in {max(delay, retry_after or 0):.1f}s"
+            )
+            await asyncio.sleep(max(delay, retry_after or 0))
+            continue
+
+        usage = getattr(response, "usage", None)
+        if usage is not None and getattr(usage, "total_tokens", None) is not None:
+            limiter.settle(reserved, usage.total_tokens)
+        return response
+
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, (openai.RateLimitError, openai.APIConnectionError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code in _RETRY_STATUSES
+
+
+def _retry_after(error: Exception) -> float | None:
+    """Seconds the API asked us to wait, from Retry-After(-ms) headers."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = _header_number(headers, name)
+        if value is not None:
+            return value * scale
+    return None
+
+
+def _header_number(headers, name: str) -> float | None:
+    try:
+        return float(headers.get(name))
+    except (TypeError, ValueError):
+        return None
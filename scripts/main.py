@@ -4,6 +4,8 @@ import logging
 from dotenv import load_dotenv
 
 from scripts.pipeline import run_pipeline
+from scripts.transcription_backends import BACKENDS
+from scripts.video_clipper import RENDER_MODES, RENDER_MODE_SEGMENTS
 
 # Configure logging
 logging.basicConfig(
@@ -22,6 +24,10 @@ async def main():
     parser.add_argument("--n_answers", type=int, help="Number of highlight sets to generate", default=1)
     parser.add_argument("--model", type=str, help="OpenAI model to use", default="gpt-4o-mini")
     parser.add_argument("--temperature", type=float, help="LLM temperature", default=0.7)
+    parser.add_argument("--render_mode", type=str, choices=RENDER_MODES, help="How highlight clips are rendered", default=RENDER_MODE_SEGMENTS)
+    parser.add_argument("--transcription_chunks", type=int, help="Split the audio into this many chunks and transcribe them in parallel", default=1)
+    parser.add_argument("--transcription_backend", type=str, choices=list(BACKENDS), help="Speech-to-text engine (default: TRANSCRIPTION_BACKEND env var or assemblyai)", default=None)
+    parser.add_argument("--highlight_window_tokens", type=int, help="Split longer transcripts into windows of this many tokens for map-reduce highlight extraction (0 = one prompt)", default=None)
     parser.add_argument("--verbose", action="store_true", help="Enable debug logging")
 
     args = parser.parse_args()
@@ -36,6 +42,10 @@ async def main():
         n_answers=args.n_answers,
         model=args.model,
         temperature=args.temperature,
+        render_mode=args.render_mode,
+        transcription_chunks=args.transcription_chunks,
+        transcription_backend=args.transcription_backend,
+        highlight_window_tokens=args.highlight_window_tokens,
     )
 
     if result["status"] == "ok":
@@ -4,18 +4,107 @@ Can be called from both CLI (main.py) and API (server/routes/pipeline.py).
 """
 
 import os
+import time
+import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
-from openai import AsyncOpenAI
+from typing import Callable
 
 from scripts.audio_processor import get_extracted_audio
-from scripts.transcriber import get_cached_transcription
-from scripts.llm_assistant import build_prompt, get_multiple_answers_async
-from scripts.segment_matcher import extract_lines_from_answer, match_lines_to_segments, merge_overlapping_segments
-from scripts.video_clipper import clip_video_segments
+from scripts.transcriber import get_cached_transcription, get_cached_transcription_streaming
+from scripts.llm_assistant import HIGHLIGHT_WINDOW_TOKENS, get_windowed_answers_async
+from scripts.llm_client import get_client
+from scripts.segment_matcher import extract_lines_from_answer, match_line_sets_to_segments, merge_overlapping_segments
+from scripts.video_clipper import RENDER_MODE_SEGMENTS, clip_video_segments
+from scripts.word_matcher import TranscriptIndex
 
 logger = logging.getLogger(__name__)
 
+# Threads shared by all pipeline runs in this process for the long blocking
+# stages (ffmpeg audio extraction, transcription upload and polling), so
+# concurrent jobs overlap those waits without ever blocking the event loop
+# or exhausting the default executor
+PIPELINE_IO_WORKERS = int(os.getenv("PIPELINE_IO_WORKERS", 8))
+
+_io_executor: ThreadPoolExecutor | None = None
+
+# Share of overall progress (percent) credited to each stage as it finishes;
+# the render share is split evenly between the highlight sets
+STAGE_WEIGHTS = {"extract": 10, "transcribe": 40, "llm": 25, "match": 5, "render": 20}
+
+
+async def _run_blocking(func, *args, **kwargs):
+    """Runs a blocking call on the shared, bounded pipeline I/O executor."""
+    global _io_executor
+    if _io_executor is None:
+        _io_executor = ThreadPoolExecutor(max_workers=PIPELINE_IO_WORKERS, thread_name_prefix="pipeline-io")
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_io_executor, partial(func, *args, **kwargs))
+
+
+class _StageEvents:
+    """
+    Reports pipeline stage progress to an on_event callback.
+
+    Each event is a JSON-serializable dict:
+
+        {"stage": "extract" | "transcribe" | "llm" | "match" | "render" | "pipeline",
+         "status": "started" | "done" | "skipped" | "failed",
+         "progress": percent of the whole run completed,
+         "elapsed": seconds since the run started,
+         "duration": seconds the stage took (finished stages only),
+         ...stage-specific fields ("set", "clip", "error", ...)}
+    """
+
+    def __init__(self, on_event: Callable[[dict], None] | None):
+        self.on_event = on_event
+        self.progress = 0.0
+        self._started = time.monotonic()
+        self._stage_started: dict[tuple, float] = {}
+
+    def start(self, stage: str, **fields) -> None:
+        self._stage_started[(stage, fields.get("set"))] = time.monotonic()
+        self._emit(stage, "started", **fields)
+
+    def finish(self, stage: str, status: str = "done", weight: float | None = None, **fields) -> None:
+        began = self._stage_started.pop((stage, fields.get("set")), None)
+        if began is not None:
+            fields["duration"] = round(time.monotonic() - began, 3)
+        self.progress = min(100.0, self.progress + (STAGE_WEIGHTS[stage] if weight is None else weight))
+        self._emit(stage, status, **fields)
+
+    def _emit(self, stage: str, status: str, **fields) -> None:
+        if self.on_event is None:
+            return
+        event = {
+            "stage": stage,
+            "status": status,
+            "progress": round(self.progress, 1),
+            "elapsed": round(time.monotonic() - self._started, 3),
+            **fields,
+        }
+        try:
+            self.on_event(event)
+        except Exception as e:
+            # Progress reporting must never fail the run itself
+            logger.warning(f"Progress callback failed on {stage} {status} event: {e}")
+
+
+def _refresh_cached_audio(audio_path: str) -> bool:
+    """
+    Marks cached audio as just used; False if it no longer exists.
+
+    Refreshing its mtime puts it inside the cache's eviction grace period
+    (see cache_store) for the rest of the job.
+    """
+    try:
+        os.utime(audio_path)
+        return True
+    except FileNotFoundError:
+        return False
+
 
 async def run_pipeline(
     video_path: str,
@@ -23,6 +112,17 @@ async def run_pipeline(
     model: str = "gpt-4o-mini",
     temperature: float = 0.7,
     work_dir: str | None = None,
+    render_mode: str = RENDER_MODE_SEGMENTS,
+    audio_cache_dir: str | None = None,
+    stream_audio: bool = False,
+    audio_codec: str = "flac",
+    transcription_chunks: int = 1,
+    transcription_backend: str | None = None,
+    audio_path: str | None = None,
+    cache_dir: str | None = None,
+    highlight_window_tokens: int | None = None,
+    bypass_llm_cache: bool = False,
+    on_event: Callable[[dict], None] | None = None,
 ) -> dict:
     """
     Run the full longform-to-shorts pipeline.
@@ -34,6 +134,43 @@ async def run_pipeline(
         temperature: LLM temperature for generation.
         work_dir: Optional working directory for intermediate/output files.
                   If None, uses the project root (backward compatible for CLI).
+        render_mode: How clip_video_segments renders each highlight set
+                     ("segments", "filter_complex" or "smart_cut").
+        audio_cache_dir: Optional content-addressed audio cache shared across
+                         jobs.  If None, audio is cached under cache_dir/audio,
+                         or work_dir/audio without a cache_dir.
+        stream_audio: Pipe ffmpeg's audio straight into the transcription
+                      upload instead of extracting a WAV to disk first.
+        audio_codec: Codec streamed when stream_audio is set ("flac", "opus"
+                     or "wav").
+        transcription_chunks: Split the extracted audio at silences into this
+                              many chunks and transcribe them in parallel.
+        transcription_backend: Transcription backend name ("assemblyai",
+                               "fixture" or "whisper").  If None, uses the
+                               TRANSCRIPTION_BACKEND env var (default AssemblyAI).
+        audio_path: Audio already extracted from the video (e.g. while it was
+                    being uploaded); skips the extraction step.  If it has
+                    been evicted from the audio cache since, the audio is
+                    extracted again.
+        cache_dir: Optional root of the persistent cache shared across jobs
+                   (see cache_store), holding audio/, transcriptions/,
+                   llm/ and matches/ tiers, which are size and TTL evicted.
+                   If None, audio and transcriptions are cached under
+                   work_dir and kept indefinitely, and LLM responses and
+                   matches are not cached.
+        highlight_window_tokens: Split transcripts longer than this many
+                                 tokens into windows and extract highlights
+                                 map-reduce style (see
+                                 get_windowed_answers_async); 0 sends the
+                                 whole transcript in one prompt.  If None,
+                                 uses the HIGHLIGHT_WINDOW_TOKENS env var.
+        bypass_llm_cache: Ignore cached LLM responses and ask the model again
+                          (fresh responses are still cached).
+        on_event: Optional callback receiving a progress event dict as each
+                  stage starts and finishes (see _StageEvents).  Render
+                  "done" events carry the finished clip under "clip", so
+                  callers can publish each highlight set as soon as it is
+                  rendered.
 
     Returns:
         dict with keys:
@@ -51,80 +188,178 @@ async def run_pipeline(
     # Use work_dir if provided, otherwise fall back to project root
     base_dir = Path(work_dir) if work_dir else project_root
     audio_dir = base_dir / "audio"
-    cache_dir = base_dir / ".cache"
     clipped_dir = base_dir / "clipped"
 
+    # Persistent caches live outside work_dir, which is scratch space
+    if cache_dir is not None:
+        audio_cache_dir = audio_cache_dir or str(Path(cache_dir) / "audio")
+        transcription_cache_dir = Path(cache_dir) / "transcriptions"
+        llm_cache_dir = str(Path(cache_dir) / "llm")
+        match_cache_dir = str(Path(cache_dir) / "matches")
+    else:
+        transcription_cache_dir = base_dir / ".cache"
+        llm_cache_dir = None
+        match_cache_dir = None
+
     result = {"status": "ok", "clips": [], "errors": []}
+    events = _StageEvents(on_event)
 
     if not video_path_obj.exists():
-        return {"status": "error", "clips": [], "errors": [f"Video file not found: {video_path_obj}"]}
+        return _failed(events, "extract", f"Video file not found: {video_path_obj}")
 
-    client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    # Shared, pooled client; requests are rate limited process-wide
+    client = get_client()
 
-    # 1. Extract Audio
-    try:
-        logger.info(f"Extracting audio from {video_path_obj.name}...")
-        audio_path = get_extracted_audio(str(video_path_obj), str(audio_dir))
-    except Exception as e:
-        return {"status": "error", "clips": [], "errors": [f"Error extracting audio: {e}"]}
+    if stream_audio:
+        # 1+2. Extract and transcribe in one pass; no WAV is written to disk
+        events.start("transcribe", streamed=True)
+        try:
+            logger.info(f"Streaming {audio_codec} audio from {video_path_obj.name} for transcription...")
+            transcription_data = await _run_blocking(
+                get_cached_transcription_streaming,
+                video_path_obj, cache_dir=str(transcription_cache_dir), codec=audio_codec, backend=transcription_backend,
+                evict_cache=cache_dir is not None,
+            )
+        except Exception as e:
+            return _failed(events, "transcribe", f"Error transcribing audio: {e}")
+        events.finish("transcribe", weight=STAGE_WEIGHTS["extract"] + STAGE_WEIGHTS["transcribe"], streamed=True)
+    else:
+        # 1. Extract Audio (unless the caller already did)
+        if audio_path is not None and not _refresh_cached_audio(audio_path):
+            # Evicted from the shared audio cache while the job was queued
+            logger.warning(f"Pre-extracted audio {Path(audio_path).name} is gone; extracting again")
+            audio_path = None
+        if audio_path is not None:
+            logger.info(f"Using pre-extracted audio {Path(audio_path).name}")
+            events.finish("extract", "skipped")
+        else:
+            events.start("extract")
+            try:
+                logger.info(f"Extracting audio from {video_path_obj.name}...")
+                audio_path = await _run_blocking(
+                    get_extracted_audio, str(video_path_obj), str(audio_dir), cache_dir=audio_cache_dir
+                )
+            except Exception as e:
+                return _failed(events, "extract", f"Error extracting audio: {e}")
+            events.finish("extract")
 
-    # 2. Transcribe
-    try:
-        logger.info("Starting transcription...")
-        transcription_data = get_cached_transcription(audio_path, api_key=None, cache_dir=str(cache_dir))
-        whisper_segments = transcription_data.get("segments") or []
-        words = transcription_data.get("words") or []
-        logger.info(f"Transcription complete: {len(whisper_segments)} segments, {len(words)} words")
-    except Exception as e:
-        return {"status": "error", "clips": [], "errors": [f"Error transcribing audio: {e}"]}
+        # 2. Transcribe
+        events.start("transcribe")
+        try:
+            logger.info("Starting transcription...")
+            transcription_data = await _run_blocking(
+                get_cached_transcription,
+                audio_path,
+                cache_dir=str(transcription_cache_dir),
+                n_chunks=transcription_chunks,
+                backend=transcription_backend,
+                evict_cache=cache_dir is not None,
+            )
+        except Exception as e:
+            return _failed(events, "transcribe", f"Error transcribing audio: {e}")
+        events.finish("transcribe")
+
+    whisper_segments = transcription_data.get("segments") or []
+    words = transcription_data.get("words") or []
+    logger.info(f"Transcription complete: {len(whisper_segments)} segments, {len(words)} words")
+
+    # Index the words once; every highlight set is matched against it
+    word_index = await asyncio.to_thread(TranscriptIndex, words) if words else None
 
     # 3. Prepare Full Transcript
-    full_transcript = "\n".join([seg['text'].strip() for seg in whisper_segments])
+    transcript_lines = [seg['text'].strip() for seg in whisper_segments]
 
-    # 4. Extract Key Moments (Parallel)
+    # 4. Extract Key Moments (Parallel; windowed for long transcripts)
     logger.info(f"Generating {n_answers} Key Moments set(s) using {model}...")
-    prompt = build_prompt(full_transcript)
-    highlight_sets = await get_multiple_answers_async(
-        prompt, client, n_answers=n_answers, model=model, temperature=temperature
+    events.start("llm", n_answers=n_answers, model=model)
+    highlight_sets = await get_windowed_answers_async(
+        transcript_lines, client, n_answers=n_answers, model=model, temperature=temperature,
+        max_window_tokens=HIGHLIGHT_WINDOW_TOKENS if highlight_window_tokens is None else highlight_window_tokens,
+        cache_dir=llm_cache_dir, bypass_cache=bypass_llm_cache,
     )
+    events.finish("llm", n_answers=len(highlight_sets))
 
-    # 5. Process each highlight set
-    for i, highlights in enumerate(highlight_sets, 1):
-        logger.info(f"Processing Highlight Set {i}: {len(highlights)} segments found")
+    # 5. Match every highlight set against the transcript in a single pass
+    events.start("match")
+    line_sets = [extract_lines_from_answer(highlights) for highlights in highlight_sets]
+    logger.debug(f"Matching lines to transcript for {len(line_sets)} set(s)...")
+    matched_sets = await asyncio.to_thread(
+        match_line_sets_to_segments, line_sets, whisper_segments,
+        words=words, index=word_index, cache_dir=match_cache_dir,
+    )
+    events.finish("match", matched=sum(1 for matched in matched_sets if matched))
+    if word_index is not None:
+        cache_stats = word_index.hit_cache.stats()
+        logger.info(
+            f"Word hit cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+            f"({cache_stats['hit_rate']:.0%} hit rate)"
+        )
 
-        lines = extract_lines_from_answer(highlights)
+    # 6. Prepare each highlight set for rendering
+    render_weight = STAGE_WEIGHTS["render"] / max(1, len(highlight_sets))
+    renders = []
+    for i, (highlights, lines, matched) in enumerate(zip(highlight_sets, line_sets, matched_sets), 1):
+        logger.info(f"Processing Highlight Set {i}: {len(highlights)} segments found")
 
         if not lines:
             logger.warning(f"No text lines found in Set {i}. Skipping.")
             result["errors"].append(f"No text lines found in Set {i}")
+            events.finish("render", "skipped", weight=render_weight, set=i, error=result["errors"][-1])
             continue
 
-        logger.debug(f"Matching lines to transcript for Set {i}...")
-        matched = match_lines_to_segments(lines, whisper_segments, words=words)
-
-        if matched:
-            logger.info(f"  Matched {len(matched)} fragments. Merging overlaps...")
-            raw_segments = [(start, end) for start, end, _ in matched]
-            merged_segments = merge_overlapping_segments(raw_segments)
-
-            output_file = clipped_dir / f"highlight_set_{i}.mp4"
-            logger.info(f"Creating highlight video: {output_file.name}")
-            try:
-                clip_video_segments(str(video_path_obj), merged_segments, str(output_file), words=words)
-                logger.info(f"✅ Successfully saved {output_file.name}")
-                result["clips"].append({
-                    "path": str(output_file),
-                    "segments": [{"start": s, "end": e} for s, e in merged_segments],
-                })
-            except Exception as e:
-                error_msg = f"Error creating highlight video {i}: {e}"
-                logger.error(error_msg)
-                result["errors"].append(error_msg)
-        else:
+        if not matched:
             logger.warning(f"No segments matched for Set {i}.")
             result["errors"].append(f"No segments matched for Set {i}")
+            events.finish("render", "skipped", weight=render_weight, set=i, error=result["errors"][-1])
+            continue
+
+        logger.info(f"  Matched {len(matched)} fragments. Merging overlaps...")
+        raw_segments = [(start, end) for start, end, _ in matched]
+        merged_segments = merge_overlapping_segments(raw_segments)
+        output_file = clipped_dir / f"highlight_set_{i}.mp4"
+        logger.info(f"Creating highlight video: {output_file.name}")
+        renders.append((i, output_file, merged_segments))
+
+    # 7. Render all sets concurrently off the event loop. ffmpeg processes
+    # are capped process-wide inside video_clipper, across sets and jobs.
+    # Each set is reported as soon as it finishes, not when all are done.
+    clips_by_set = {}
+
+    async def render_set(i: int, output_file: Path, merged_segments: list[tuple[float, float]]):
+        events.start("render", set=i)
+        try:
+            await asyncio.to_thread(
+                clip_video_segments, str(video_path_obj), merged_segments, str(output_file),
+                words=words, render_mode=render_mode,
+            )
+        except Exception as e:
+            error_msg = f"Error creating highlight video {i}: {e}"
+            logger.error(error_msg)
+            result["errors"].append(error_msg)
+            events.finish("render", "failed", weight=render_weight, set=i, error=error_msg)
+            return
+
+        logger.info(f"✅ Successfully saved {output_file.name}")
+        clip = {
+            "path": str(output_file),
+            "segments": [{"start": s, "end": e} for s, e in merged_segments],
+        }
+        clips_by_set[i] = clip
+        events.finish("render", weight=render_weight, set=i, clip=clip)
+
+    await asyncio.gather(*(render_set(*render) for render in renders))
+    result["clips"] = [clips_by_set[i] for i in sorted(clips_by_set)]
 
     if not result["clips"] and result["errors"]:
         result["status"] = "error"
 
+    events.progress = 100.0
+    events.finish("pipeline", result["status"], weight=0, clips=len(result["clips"]), errors=len(result["errors"]))
     return result
+
+
+def _failed(events: _StageEvents, stage: str, error: str) -> dict:
+    """Reports *stage* as failed and returns the pipeline's error result."""
+    events.finish(stage, "failed", weight=0, error=error)
+    events.finish("pipeline", "error", weight=0, clips=0, errors=1)
+    return {"status": "error", "clips": [], "errors": [error]}
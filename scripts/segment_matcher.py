@@ -1,11 +1,20 @@
 import re
+import json
+import hashlib
 from difflib import SequenceMatcher
 
 try:
-    from word_matcher import match_phrases_to_words
+    from cache_store import CacheStore
+    from transcript_store import as_word_table
+    from word_matcher import TranscriptIndex, match_phrase_sets_to_words, match_phrases_to_words
 except ImportError:
     # Fallback for when running as module
-    from scripts.word_matcher import match_phrases_to_words
+    from scripts.cache_store import CacheStore
+    from scripts.transcript_store import as_word_table
+    from scripts.word_matcher import TranscriptIndex, match_phrase_sets_to_words, match_phrases_to_words
+
+# Bump when matching changes in a way that invalidates cached matches
+_MATCH_CACHE_VERSION = 1
 
 
 def extract_lines_from_answer(answer: str | list[str]) -> list[str]:
@@ -48,6 +57,7 @@ def match_lines_to_segments(
     whisper_segments: list[dict],
     words: list[dict] = None,
     threshold: float = 0.5,
+    index: TranscriptIndex | None = None,
 ) -> list[tuple[float, float, str]]:
     """
     Matches each LLM-output line to the transcript using word-level timestamps
@@ -59,6 +69,8 @@ def match_lines_to_segments(
         words: Optional list of word dicts with 'text', 'start', 'end', 'confidence'.
                If provided, uses precise word-level matching.
         threshold: Minimum similarity ratio to consider a match.
+        index: Optional TranscriptIndex built once over *words*, so repeated
+               calls for different highlight sets share the same token index.
 
     Returns:
         list[tuple[float, float, str]]: List of (start, end, matched_text) using
@@ -67,7 +79,7 @@ def match_lines_to_segments(
     # Prefer word-level matching if words are available
     if words:
         print(f"  Using word-level matching for {len(lines)} phrases...")
-        return match_phrases_to_words(lines, words, threshold=threshold)
+        return match_phrases_to_words(lines, words, threshold=threshold, index=index)
     
     # Fallback to segment-level matching
     print(f"  Using segment-level matching for {len(lines)} phrases...")
@@ -83,6 +95,82 @@ def match_lines_to_segments(
     return results
 
 
+def match_line_sets_to_segments(
+    line_sets: list[list[str]],
+    whisper_segments: list[dict],
+    words: list[dict] = None,
+    threshold: float = 0.5,
+    index: TranscriptIndex | None = None,
+    cache_dir: str | None = None,
+) -> list[list[tuple[float, float, str]]]:
+    """
+    Matches the lines of several highlight sets at once.
+
+    With word-level timestamps, all sets are aligned in a single sweep of
+    the transcript (see match_phrase_sets_to_words); otherwise each set
+    falls back to match_lines_to_segments.
+
+    Args:
+        line_sets: One list of verbatim lines per highlight set.
+        whisper_segments: The raw segments list (for compatibility/fallback).
+        words: Optional list of word dicts with 'text', 'start', 'end', 'confidence'.
+        threshold: Minimum similarity ratio to consider a match.
+        index: Optional TranscriptIndex built once over *words*.
+        cache_dir: Optional shared cache of matches, keyed by the transcript
+                   and each set's lines; only uncached sets are matched.
+
+    Returns:
+        list[list[tuple[float, float, str]]]: (start, end, matched_text) tuples
+        for each set, in the same order as *line_sets*.
+    """
+    if cache_dir is not None:
+        return _match_line_sets_cached(CacheStore(cache_dir), line_sets, whisper_segments, words, threshold, index)
+
+    if words:
+        print(f"  Using word-level matching for {sum(len(l) for l in line_sets)} phrases "
+              f"across {len(line_sets)} set(s)...")
+        return match_phrase_sets_to_words(line_sets, words, threshold=threshold, index=index)
+
+    return [match_lines_to_segments(lines, whisper_segments, threshold=threshold) for lines in line_sets]
+
+
+def _match_line_sets_cached(store, line_sets, whisper_segments, words, threshold, index):
+    """match_line_sets_to_segments backed by *store*."""
+    digest = _transcript_digest(whisper_segments, words)
+    keys = []
+    for lines in line_sets:
+        hasher = hashlib.blake2b(digest_size=20)
+        hasher.update(json.dumps([_MATCH_CACHE_VERSION, digest, threshold, lines]).encode("utf-8"))
+        keys.append(f"{hasher.hexdigest()}.json")
+
+    matched_sets = [store.get_json(key) for key in keys]
+    missing = [i for i, matched in enumerate(matched_sets) if matched is None]
+    if missing:
+        fresh = match_line_sets_to_segments(
+            [line_sets[i] for i in missing], whisper_segments, words=words, threshold=threshold, index=index
+        )
+        for i, matched in zip(missing, fresh):
+            matched_sets[i] = matched
+            store.put_json(keys[i], matched)
+    if len(missing) < len(line_sets):
+        print(f"  Reused cached matches for {len(line_sets) - len(missing)} of {len(line_sets)} set(s)")
+
+    return [[tuple(match) for match in matched] for matched in matched_sets]
+
+
+def _transcript_digest(whisper_segments, words) -> str:
+    """Content hash of the transcript that matches are computed against."""
+    hasher = hashlib.blake2b(digest_size=20)
+    if words:
+        table = as_word_table(words)
+        hasher.update(table.start.tobytes())
+        hasher.update(table.end.tobytes())
+        hasher.update("\x00".join(table.texts()).encode("utf-8"))
+    else:
+        hasher.update(json.dumps([[s["start"], s["end"], s["text"]] for s in whisper_segments]).encode("utf-8"))
+    return hasher.hexdigest()
+
+
 def merge_overlapping_segments(
     segments: list[tuple[float, float]],
 ) -> list[tuple[float, float]]:
@@ -8,6 +8,12 @@ using the word-level timestamps returned by AssemblyAI.
 import logging
 from pathlib import Path
 
+try:
+    from transcript_store import Word, WordTable
+except ImportError:
+    # Fallback for when running as module
+    from scripts.transcript_store import Word, WordTable
+
 logger = logging.getLogger(__name__)
 
 # Maximum number of words per subtitle chunk
@@ -25,6 +31,14 @@ def _seconds_to_srt_time(seconds: float) -> str:
     return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
 
 
+def _words_in_range(words, start: float, end: float) -> list[Word]:
+    """Words overlapping (start, end); vectorized when *words* is a WordTable."""
+    if isinstance(words, WordTable):
+        return words.overlapping(start, end)
+    # Plain word dicts from external callers
+    return [Word.from_dict(w) for w in words if w["end"] > start and w["start"] < end]
+
+
 def generate_srt(
     words: list[dict],
     segment_start: float,
@@ -52,10 +66,7 @@ def generate_srt(
 
     # Filter words that fall within the segment (with a small tolerance)
     tolerance = 0.05
-    segment_words = [
-        w for w in words
-        if w["end"] > segment_start - tolerance and w["start"] < segment_end + tolerance
-    ]
+    segment_words = _words_in_range(words, segment_start - tolerance, segment_end + tolerance)
 
     if not segment_words:
         logger.warning(
@@ -74,10 +85,10 @@ def generate_srt(
     srt_lines: list[str] = []
     for idx, chunk in enumerate(chunks, start=1):
         # Rebase timestamps so the clip starts at 0
-        chunk_start = max(0.0, chunk[0]["start"] - segment_start)
-        chunk_end = max(chunk_start + 0.1, chunk[-1]["end"] - segment_start)
+        chunk_start = max(0.0, chunk[0].start - segment_start)
+        chunk_end = max(chunk_start + 0.1, chunk[-1].end - segment_start)
 
-        text = " ".join(w["text"] for w in chunk)
+        text = " ".join(w.text for w in chunk)
 
         srt_lines.append(str(idx))
         srt_lines.append(
@@ -196,10 +207,7 @@ def generate_ass(
 
     # Filter words to the segment time range
     tolerance = 0.05
-    segment_words = [
-        w for w in words
-        if w["end"] > segment_start - tolerance and w["start"] < segment_end + tolerance
-    ]
+    segment_words = _words_in_range(words, segment_start - tolerance, segment_end + tolerance)
 
     # Build the ASS file
     header = _build_ass_header(s)
@@ -216,14 +224,14 @@ def generate_ass(
 
     for i, word in enumerate(segment_words):
         # Rebase to clip time (clip starts at 0)
-        w_start = max(0.0, word["start"] - segment_start)
-        w_end_raw = max(w_start + 0.05, word["end"] - segment_start)
+        w_start = max(0.0, word.start - segment_start)
+        w_end_raw = max(w_start + 0.05, word.end - segment_start)
 
         # To prevent flickering between words, extend the end time of the current word
         # to match exactly the start time of the next word, provided the gap isn't huge.
         w_end = w_end_raw
         if i + 1 < len(segment_words):
-            next_start = max(0.0, segment_words[i+1]["start"] - segment_start)
+            next_start = max(0.0, segment_words[i+1].start - segment_start)
             gap = next_start - w_end_raw
             if 0 < gap < 0.5:  # If silence is less than 500ms, bridge the gap
                 w_end = next_start
@@ -238,7 +246,7 @@ def generate_ass(
 
         parts: list[str] = []
         for j in range(ctx_start, ctx_end):
-            w_text = segment_words[j]["text"]
+            w_text = segment_words[j].text
             if j == i:
                 # Current word: highlighted (just color change, no scale/fade to avoid blinking)
                 parts.append(
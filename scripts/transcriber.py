@@ -1,118 +1,389 @@
 import os
 import json
 import hashlib
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, wait
 from pathlib import Path
-import assemblyai as aai
 
-def get_file_hash(filepath):
+try:
+    from audio_processor import (
+        AudioStream,
+        detect_silences,
+        extract_audio_chunk,
+        fast_file_hash,
+        plan_chunks,
+        probe_duration,
+        source_cache_key,
+    )
+    from cache_store import CacheStore
+    from transcription_backends import AssemblyAIBackend, TranscriptionBackend, get_backend
+    from transcript_store import load_transcription, migrate_json_transcription, save_transcription
+except ImportError:
+    # Fallback for when running as module
+    from scripts.audio_processor import (
+        AudioStream,
+        detect_silences,
+        extract_audio_chunk,
+        fast_file_hash,
+        plan_chunks,
+        probe_duration,
+        source_cache_key,
+    )
+    from scripts.cache_store import CacheStore
+    from scripts.transcription_backends import AssemblyAIBackend, TranscriptionBackend, get_backend
+    from scripts.transcript_store import load_transcription, migrate_json_transcription, save_transcription
+
+# Concurrent uploads when a transcription is split into chunks
+TRANSCRIPTION_CHUNK_WORKERS = int(os.getenv("TRANSCRIPTION_CHUNK_WORKERS", 4))
+
+# Sidecar index of memoized fingerprints, kept in the transcription cache dir
+FINGERPRINT_INDEX = "fingerprints.json"
+
+# Oldest fingerprints are dropped from the index past this many entries
+_FINGERPRINT_INDEX_MAX_ENTRIES = 1024
+
+
+def get_file_hash(filepath, index_dir=None):
+    """
+    MD5 of a file's content, memoized so repeat lookups skip the full read.
+
+    Without *index_dir* the whole file is hashed.  With it, fingerprints are
+    looked up in a sidecar index there, cheapest check first:
+
+    1. same path, size and mtime as a remembered entry: reuse its MD5;
+    2. same size, mtime and sampled-block hash (fast_file_hash) as any
+       remembered entry, e.g. the same audio moved or copied with its
+       mtime preserved: reuse that MD5;
+    3. otherwise (new or modified content): hash the whole file.
+
+    Size and sampled blocks alone are never trusted: a WAV's size only
+    depends on its duration, so an edited file of the same length could
+    differ only outside the sampled blocks.
+
+    Args:
+        filepath: File to fingerprint
+        index_dir: Optional directory holding the sidecar index
+
+    Returns:
+        Hex MD5 digest of the file's content
+    """
+    if index_dir is None:
+        return _md5_file(filepath)
+
+    path = Path(filepath).resolve()
+    stat = path.stat()
+    index_file = Path(index_dir) / FINGERPRINT_INDEX
+    index = _load_fingerprint_index(index_file)
+
+    entry = index.get(str(path))
+    if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+        return entry["md5"]
+
+    sample = fast_file_hash(path)
+    md5 = next(
+        (
+            e["md5"] for e in index.values()
+            if e["size"] == stat.st_size and e["mtime_ns"] == stat.st_mtime_ns and e["sample"] == sample
+        ),
+        None,
+    )
+    if md5 is None:
+        md5 = _md5_file(path)
+
+    index.pop(str(path), None)
+    index[str(path)] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sample": sample, "md5": md5}
+    while len(index) > _FINGERPRINT_INDEX_MAX_ENTRIES:
+        index.pop(next(iter(index)))
+    _save_fingerprint_index(index_file, index)
+    return md5
+
+def _md5_file(filepath):
     hasher = hashlib.md5()
     with open(filepath, "rb") as f:
-        for chunk in iter(lambda: f.read(8192), b""):
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
             hasher.update(chunk)
     return hasher.hexdigest()
 
-def get_cached_transcription(audio_path, api_key=None, cache_dir="./.cache"):
+def _load_fingerprint_index(index_file):
+    try:
+        with open(index_file, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def _save_fingerprint_index(index_file, index):
+    # Write-then-rename so concurrent jobs never read a half-written index
+    index_file.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=index_file.parent, prefix=f"{index_file.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp_name, index_file)
+    finally:
+        if os.path.exists(tmp_name):
+            os.remove(tmp_name)
+
+def get_cached_transcription_streaming(
+    video_path,
+    api_key=None,
+    cache_dir="./.cache",
+    codec="flac",
+    keep_audio_path=None,
+    backend=None,
+    evict_cache=False,
+):
+    """
+    Transcribes a video's audio without extracting it to disk first.
+
+    ffmpeg's output is piped straight into the transcription upload through
+    an AudioStream, which MD5-hashes the bytes as they go by.  The result is
+    cached by that MD5 like get_cached_transcription, and a small alias file
+    maps the source video's source_cache_key to it, so later calls for the
+    same video hit the cache without running ffmpeg at all.
+
+    Args:
+        video_path: Path to the source video
+        api_key: AssemblyAI API key (if None, reads from ASSEMBLYAI_API_KEY env var)
+        cache_dir: Directory to cache transcriptions
+        codec: Audio codec streamed to AssemblyAI ("flac", "opus" or "wav")
+        keep_audio_path: Optional path to also save the streamed audio to
+        backend: TranscriptionBackend or backend name (default DEFAULT_BACKEND)
+        evict_cache: Evict old entries from *cache_dir* (see get_cached_transcription)
+
+    Returns:
+        dict with 'text', 'words', and 'segments' keys (see get_cached_transcription)
+    """
+    video_path = Path(video_path)
+    if not video_path.exists():
+        raise FileNotFoundError(f"Video file not found: {video_path}")
+
+    backend = _resolve_backend(backend, api_key)
+    store = CacheStore(cache_dir)
+    alias = f"stream_{_cache_key(source_cache_key(video_path), backend)}_{codec}.md5"
+
+    cached = _load_stream_alias(cache_dir, alias, backend)
+    if cached is not None:
+        print(f"Loading cached transcription for {video_path.name}...")
+        return cached
+
+    with store.lock(alias):
+        # Another job may have transcribed it while we waited for the lock
+        cached = _load_stream_alias(cache_dir, alias, backend)
+        if cached is not None:
+            return cached
+
+        with AudioStream(video_path, codec=codec, tee_path=keep_audio_path) as stream:
+            result_dict = backend.transcribe(stream, name=stream.name)
+            # The upload has consumed the whole stream by now
+            file_hash = stream.hexdigest()
+        print(f"Streamed {stream.bytes_read / 1024 / 1024:.1f} MB of {codec} audio")
+
+        result_dict = _save_cached_transcription(
+            cache_dir, _cache_key(file_hash, backend), result_dict, evict_cache=evict_cache
+        )
+        tmp_path = store.temp_path(alias)
+        tmp_path.write_text(file_hash)
+        os.replace(tmp_path, store.path(alias))
+
+    return result_dict
+
+def get_cached_transcription(
+    audio_path,
+    api_key=None,
+    cache_dir="./.cache",
+    n_chunks=1,
+    max_workers=None,
+    backend=None,
+    evict_cache=False,
+):
     """
-    Transcribes audio using AssemblyAI with word-level timestamps, with caching logic.
+    Transcribes audio with word-level timestamps, with caching logic.
+
+    Transcription is done by a TranscriptionBackend (AssemblyAI unless
+    another one is selected, see transcription_backends).  All backends
+    share the cache; entries are keyed by the audio's MD5 plus the
+    backend's cache_tag.
+
+    With n_chunks > 1 the audio is split at silences into that many chunks,
+    which are transcribed concurrently and stitched back together.  Every
+    chunk is cached on its own, so after a failure only the failed chunks
+    are sent again.
     
     Args:
         audio_path: Path to audio file
         api_key: AssemblyAI API key (if None, reads from ASSEMBLYAI_API_KEY env var)
         cache_dir: Directory to cache transcriptions
+        n_chunks: Number of chunks to transcribe in parallel (1 = whole file)
+        max_workers: Concurrent chunk transcriptions (default TRANSCRIPTION_CHUNK_WORKERS)
+        backend: TranscriptionBackend or backend name (default DEFAULT_BACKEND),
+                 e.g. "fixture" for offline tests and benchmarks
+        evict_cache: *cache_dir* is a shared cache tier (see cache_store):
+                     evict expired and least recently used entries from it
+                     after saving.  Off by default, so a local cache of paid
+                     transcriptions is kept indefinitely.
     
     Returns:
         dict with 'text', 'words', and 'segments' keys
-        - 'words': List of dicts with 'text', 'start', 'end', 'confidence'
-        - 'segments': List of dicts with 'start', 'end', 'text' (for compatibility)
+        - 'words': WordTable of Words with 'text', 'start', 'end', 'confidence'
+        - 'segments': List of Segments with 'start', 'end', 'text' (for compatibility)
     """
     audio_path = Path(audio_path)
     if not audio_path.exists():
         raise FileNotFoundError(f"Audio file not found: {audio_path}")
 
-    Path(cache_dir).mkdir(parents=True, exist_ok=True)
-    file_hash = get_file_hash(audio_path)
-    cache_file = Path(cache_dir) / f"transcription_{file_hash}.json"
-    
-    if cache_file.exists():
+    store = CacheStore(cache_dir)
+    backend = _resolve_backend(backend, api_key)
+    file_hash = _cache_key(get_file_hash(audio_path, index_dir=cache_dir), backend)
+    cached = _load_cached_transcription(cache_dir, file_hash)
+    if cached is not None:
         print(f"Loading cached transcription for {audio_path.name}...")
-        with open(cache_file, 'r') as f:
-            return json.load(f)
-    
-    # Get API key
-    if api_key is None:
-        api_key = os.getenv("ASSEMBLYAI_API_KEY")
-        if not api_key:
-            raise ValueError("ASSEMBLYAI_API_KEY not found in environment variables")
-    
-    print(f"Transcribing {audio_path.name} with AssemblyAI...")
-    aai.settings.api_key = api_key
+        return cached
 
-    # Configure speech models explicitly (required by latest AssemblyAI SDK)
-    # Use routing: try universal-3-pro first (highest accuracy), then universal-2 (broad language support)
-    config = aai.TranscriptionConfig(
-        speech_models=["universal-3-pro", "universal-2"]
-    )
+    # Parallel jobs on the same audio pay for one transcription; the others
+    # wait here and then load its result
+    with store.lock(f"transcription_{file_hash}"):
+        cached = _load_cached_transcription(cache_dir, file_hash)
+        if cached is not None:
+            return cached
 
-    transcriber = aai.Transcriber(config=config)
-    transcript = transcriber.transcribe(str(audio_path))
-    
-    if transcript.status == aai.TranscriptStatus.error:
-        raise Exception(f"Transcription failed: {transcript.error}")
-    
-    # Extract word timestamps (AssemblyAI returns in milliseconds)
-    words = []
-    for word in transcript.words:
-        words.append({
-            "text": word.text,
-            "start": word.start / 1000.0,  # Convert ms to seconds
-            "end": word.end / 1000.0,
-            "confidence": word.confidence
-        })
-    
-    # Extract segments (for compatibility with existing code)
-    # Use sentences as segments, or create segments from words
-    segments = []
-    if hasattr(transcript, 'get_sentences'):
-        for sentence in transcript.get_sentences():
+        if n_chunks > 1:
+            result_dict = _transcribe_in_chunks(
+                audio_path, file_hash, cache_dir, n_chunks, max_workers, backend, evict_cache
+            )
+        else:
+            result_dict = backend.transcribe(audio_path, name=audio_path.name)
+
+        # Cache the result
+        return _save_cached_transcription(cache_dir, file_hash, result_dict, evict_cache=evict_cache)
+
+
+def _resolve_backend(backend, api_key):
+    # An explicit API key only makes sense for AssemblyAI
+    if backend is None and api_key is not None:
+        return AssemblyAIBackend(api_key)
+    return get_backend(backend)
+
+def _cache_key(file_hash, backend: TranscriptionBackend):
+    """Cache key for *backend*'s transcription of the audio with MD5 *file_hash*."""
+    return f"{backend.cache_tag}_{file_hash}" if backend.cache_tag else file_hash
+
+def _transcribe_in_chunks(audio_path, file_hash, cache_dir, n_chunks, max_workers, backend, evict_cache=False):
+    """
+    Transcribes *audio_path* as silence-aligned chunks in parallel and stitches the results.
+
+    Chunks are cached as transcription_<hash>_<start ms>-<end ms>; the split
+    is deterministic for a given file, so a retry finds the chunks that
+    already succeeded.  If any chunk fails, the first error is raised after
+    the others have finished (and been cached).
+    """
+    spans = plan_chunks(probe_duration(audio_path), detect_silences(audio_path), n_chunks)
+    print(f"Transcribing {audio_path.name} in {len(spans)} chunks...")
+
+    def transcribe_chunk(span, chunk_dir):
+        start, end = span
+        chunk_key = f"{file_hash}_{round(start * 1000)}-{round(end * 1000)}"
+        cached = _load_cached_transcription(cache_dir, chunk_key)
+        if cached is not None:
+            return cached
+        chunk_path = extract_audio_chunk(audio_path, start, end, Path(chunk_dir) / f"{chunk_key}.wav")
+        return _save_cached_transcription(
+            cache_dir, chunk_key, backend.transcribe(chunk_path, name=chunk_path.name), evict_cache=evict_cache
+        )
+
+    with tempfile.TemporaryDirectory(prefix="chunks_", suffix=".tmp", dir=cache_dir) as chunk_dir:
+        with ThreadPoolExecutor(max_workers=max_workers or TRANSCRIPTION_CHUNK_WORKERS) as pool:
+            futures = [pool.submit(transcribe_chunk, span, chunk_dir) for span in spans]
+            wait(futures)
+
+    failed = [f.exception() for f in futures if f.exception() is not None]
+    if failed:
+        raise RuntimeError(f"{len(failed)} of {len(spans)} transcription chunks failed: {failed[0]}") from failed[0]
+
+    return _stitch_chunks([(start, f.result()) for (start, _), f in zip(spans, futures)])
+
+def _stitch_chunks(chunks):
+    """Merges (offset, transcription) pairs into one transcription on the full timeline."""
+    words, segments, texts = [], [], []
+    for offset, chunk in chunks:
+        for word in chunk["words"]:
+            words.append({
+                "text": word["text"],
+                "start": word["start"] + offset,
+                "end": word["end"] + offset,
+                "confidence": word["confidence"],
+            })
+        for segment in chunk["segments"]:
             segments.append({
-                "start": sentence.start / 1000.0,
-                "end": sentence.end / 1000.0,
-                "text": sentence.text
+                "start": segment["start"] + offset,
+                "end": segment["end"] + offset,
+                "text": segment["text"],
             })
-    else:
-        # Fallback: create segments from words (group words into ~5-10 second segments)
-        current_segment_words = []
-        current_start = None
-        segment_duration = 0
-        
-        for word in words:
-            if current_start is None:
-                current_start = word["start"]
-            
-            current_segment_words.append(word)
-            segment_duration = word["end"] - current_start
-            
-            # Create segment when we hit ~8 seconds or end of words
-            if segment_duration >= 8.0 or word == words[-1]:
-                segments.append({
-                    "start": current_start,
-                    "end": word["end"],
-                    "text": " ".join(w["text"] for w in current_segment_words)
-                })
-                current_segment_words = []
-                current_start = None
-    
-    # Build result dict (compatible with Whisper format)
-    result_dict = {
-        "text": transcript.text,
+        if chunk.get("text"):
+            texts.append(chunk["text"])
+
+    return {
+        "text": " ".join(texts),
         "words": words,
         "segments": segments,
-        "language": transcript.language_code if hasattr(transcript, 'language_code') else "en",
+        "language": chunks[0][1].get("language", "en") if chunks else "en",
         "duration": words[-1]["end"] if words else 0.0
     }
-    
-    # Cache the result
-    with open(cache_file, 'w') as f:
-        json.dump(result_dict, f, indent=2)
-    
-    return result_dict
+
+def _load_cached_transcription(cache_dir, file_hash):
+    """
+    Loads transcription_<hash> from *cache_dir*, or None on a cache miss.
+
+    Legacy transcription_<hash>.json caches are migrated to the columnar
+    format (see transcript_store) the first time they are read.
+    """
+    columnar = Path(cache_dir) / f"transcription_{file_hash}"
+    if columnar.is_dir():
+        # Refresh its recency for CacheStore eviction
+        CacheStore(cache_dir).touch(columnar.name)
+        return load_transcription(columnar)
+
+    legacy = Path(cache_dir) / f"transcription_{file_hash}.json"
+    if legacy.exists():
+        try:
+            return migrate_json_transcription(legacy, columnar)
+        except FileNotFoundError:
+            # Another job migrated (and removed) it since exists(); not done
+            # under the key's lock, which callers may already hold
+            if columnar.is_dir():
+                return load_transcription(columnar)
+    return None
+
+def _save_cached_transcription(cache_dir, file_hash, result_dict, evict_cache=False):
+    """
+    Caches *result_dict* as transcription_<hash> and returns the cached (memory-mapped) copy.
+
+    With *evict_cache*, old entries are then evicted from *cache_dir*.
+    Legacy JSON caches are migrated first, so they count as fresh entries
+    instead of being dropped as expired before they were ever converted.
+    """
+    columnar = Path(cache_dir) / f"transcription_{file_hash}"
+    save_transcription(columnar, result_dict)
+    if evict_cache:
+        _migrate_legacy_transcriptions(cache_dir)
+        CacheStore(cache_dir).evict(keep=columnar.name)
+    return load_transcription(columnar)
+
+def _migrate_legacy_transcriptions(cache_dir):
+    """Converts every legacy transcription_<hash>.json in *cache_dir* to the columnar format."""
+    for legacy in Path(cache_dir).glob("transcription_*.json"):
+        try:
+            # save_transcription publishes atomically, so racing migrations are harmless
+            migrate_json_transcription(legacy, legacy.with_suffix(""))
+        except (FileNotFoundError, ValueError):
+            # Migrated by another job (or a reader) in the meantime, or
+            # unreadable; either way not worth failing this save over
+            continue
+
+def _load_stream_alias(cache_dir, alias, backend):
+    """Loads the transcription a stream alias file points to, or None on a miss."""
+    store = CacheStore(cache_dir)
+    if not store.touch(alias):
+        return None
+    file_hash = store.path(alias).read_text().strip()
+    return _load_cached_transcription(cache_dir, _cache_key(file_hash, backend))
+
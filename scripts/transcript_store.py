@@ -0,0 +1,294 @@
+"""
+Columnar on-disk format for cached transcriptions.
+
+A transcription is stored as a directory of raw NumPy arrays (word start,
+end and confidence, plus a packed string table for the word texts) next to
+a small JSON file holding everything else.  The arrays are memory-mapped on
+load, so opening a 25k-word transcript costs a handful of file opens instead
+of parsing and allocating tens of thousands of dicts.
+
+WordTable wraps the columns in a read-only sequence of slotted Word
+records, and segments load as Segment records.  Both also answer dict-style
+lookups (``word["start"]``, ``.get()``, ``dict(word)``), so external callers
+written against the AssemblyAI/Whisper dicts keep working unchanged.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import logging
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass, fields
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Numeric word columns, stored one .npy file each
+_NUMERIC_COLUMNS = ("start", "end", "confidence")
+
+# Everything in the transcription dict other than "words"
+_META_FILE = "meta.json"
+
+
+class _DictCompat:
+    """Read-only dict-style access to a slotted record's fields."""
+
+    __slots__ = ()
+
+    def __getitem__(self, key: str):
+        try:
+            return getattr(self, key)
+        except (AttributeError, TypeError):
+            raise KeyError(key) from None
+
+    def __contains__(self, key) -> bool:
+        return key in self.keys()
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+    def get(self, key: str, default=None):
+        return getattr(self, key, default) if isinstance(key, str) else default
+
+    def keys(self) -> tuple[str, ...]:
+        return tuple(f.name for f in fields(self))
+
+    def items(self):
+        return [(k, getattr(self, k)) for k in self.keys()]
+
+    def values(self):
+        return [getattr(self, k) for k in self.keys()]
+
+    def to_dict(self) -> dict:
+        return dict(self.items())
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Mapping):
+            return self.to_dict() == dict(other)
+        if type(other) is type(self):
+            return self.values() == other.values()
+        return NotImplemented
+
+    __hash__ = None
+
+
+@dataclass(slots=True, frozen=True, eq=False)
+class Word(_DictCompat):
+    """A transcribed word; times are in seconds."""
+
+    text: str
+    start: float
+    end: float
+    confidence: float = 1.0
+
+    @classmethod
+    def from_dict(cls, word: Mapping) -> "Word":
+        return cls(word["text"], word["start"], word["end"], word.get("confidence", 1.0))
+
+
+@dataclass(slots=True, frozen=True, eq=False)
+class Segment(_DictCompat):
+    """A transcript segment (sentence); times are in seconds."""
+
+    start: float
+    end: float
+    text: str
+
+    @classmethod
+    def from_dict(cls, segment: Mapping) -> "Segment":
+        return cls(segment["start"], segment["end"], segment["text"])
+
+
+class WordTable(Sequence):
+    """
+    Read-only list of Words backed by columnar arrays.
+
+    Indexing returns a Word and slicing returns another WordTable sharing
+    the same buffers.  The columns are also exposed directly (start, end,
+    confidence, texts()) for callers that can work on arrays.
+
+    Args:
+        start: Word start times in seconds.
+        end: Word end times in seconds.
+        confidence: Per-word confidence.
+        text: All word texts concatenated.
+        offsets: len(words) + 1 character offsets of each word into *text*.
+    """
+
+    def __init__(
+        self,
+        start: np.ndarray,
+        end: np.ndarray,
+        confidence: np.ndarray,
+        text: str,
+        offsets: np.ndarray,
+    ):
+        self.start = start
+        self.end = end
+        self.confidence = confidence
+        self._text = text
+        self._offsets = offsets
+
+    @classmethod
+    def from_dicts(cls, words: list[dict]) -> "WordTable":
+        """Builds a table from a list of word dicts."""
+        texts = [w["text"] for w in words]
+        offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+        np.cumsum([len(t) for t in texts], out=offsets[1:])
+        return cls(
+            np.array([w["start"] for w in words], dtype=np.float64),
+            np.array([w["end"] for w in words], dtype=np.float64),
+            np.array([w.get("confidence", 1.0) for w in words], dtype=np.float64),
+            "".join(texts),
+            offsets,
+        )
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            first, stop, step = i.indices(len(self))
+            if step != 1:
+                return [self[j] for j in range(first, stop, step)]
+            stop = max(first, stop)
+            return WordTable(
+                self.start[first:stop],
+                self.end[first:stop],
+                self.confidence[first:stop],
+                self._text,
+                self._offsets[first:stop + 1],
+            )
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("word index out of range")
+        return Word(
+            self._text[self._offsets[i]:self._offsets[i + 1]],
+            float(self.start[i]),
+            float(self.end[i]),
+            float(self.confidence[i]),
+        )
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (WordTable, list)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"WordTable({len(self)} words)"
+
+    def texts(self) -> list[str]:
+        """Word texts without building the per-word records."""
+        text, offsets = self._text, self._offsets.tolist()
+        return [text[a:b] for a, b in zip(offsets, offsets[1:])]
+
+    def overlapping(self, start: float, end: float) -> list[Word]:
+        """Words whose [start, end] overlaps the open interval (start, end)."""
+        hits = np.flatnonzero((self.end > start) & (self.start < end))
+        return [self[int(i)] for i in hits]
+
+    def to_list(self) -> list[dict]:
+        """Plain list of word dicts (e.g. for JSON serialization)."""
+        return [word.to_dict() for word in self]
+
+
+def as_word_table(words) -> WordTable:
+    """Returns *words* as a WordTable, converting a list of word dicts/Words if needed."""
+    return words if isinstance(words, WordTable) else WordTable.from_dicts(words)
+
+
+def save_transcription(path: str | Path, transcription: dict) -> Path:
+    """
+    Writes a transcription dict to *path* in the columnar format.
+
+    The directory is built under a temporary name and renamed into place,
+    so concurrent readers never see a partial cache entry.
+
+    Args:
+        path: Target directory (must not exist yet).
+        transcription: Dict with 'words' plus any JSON-serializable keys.
+
+    Returns:
+        The path written.
+    """
+    path = Path(path)
+    words = transcription.get("words") or []
+    table = as_word_table(words)
+
+    tmp_dir = Path(tempfile.mkdtemp(dir=path.parent, prefix=f"{path.name}.", suffix=".tmp"))
+    try:
+        for column in _NUMERIC_COLUMNS:
+            np.save(tmp_dir / f"{column}.npy", np.ascontiguousarray(getattr(table, column)))
+        np.save(tmp_dir / "offsets.npy", np.ascontiguousarray(table._offsets - table._offsets[0]))
+        text = table._text[table._offsets[0]:table._offsets[-1]] if len(table) else ""
+        (tmp_dir / "text.utf8").write_bytes(text.encode("utf-8"))
+
+        meta = {k: v for k, v in transcription.items() if k != "words"}
+        with open(tmp_dir / _META_FILE, "w") as f:
+            json.dump(meta, f, default=_record_to_json)
+
+        try:
+            os.rename(tmp_dir, path)
+        except OSError:
+            # Another job cached the same transcription first; keep theirs
+            if not (path / _META_FILE).exists():
+                raise
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return path
+
+
+def load_transcription(path: str | Path) -> dict:
+    """
+    Loads a transcription written by save_transcription.
+
+    Numeric columns are memory-mapped read-only; 'words' is a WordTable and
+    'segments' a list of Segments.
+    """
+    path = Path(path)
+    with open(path / _META_FILE, "r") as f:
+        transcription = json.load(f)
+
+    columns = {c: np.load(path / f"{c}.npy", mmap_mode="r") for c in _NUMERIC_COLUMNS}
+    transcription["words"] = WordTable(
+        columns["start"],
+        columns["end"],
+        columns["confidence"],
+        (path / "text.utf8").read_bytes().decode("utf-8"),
+        np.load(path / "offsets.npy", mmap_mode="r"),
+    )
+    transcription["segments"] = [Segment.from_dict(s) for s in transcription.get("segments") or []]
+    return transcription
+
+
+def _record_to_json(value):
+    if isinstance(value, _DictCompat):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def migrate_json_transcription(json_path: str | Path, path: str | Path) -> dict:
+    """
+    Converts a legacy JSON transcription cache to the columnar format.
+
+    The JSON file is removed once the columnar copy is in place.
+
+    Returns:
+        The transcription, loaded from the new columnar copy.
+    """
+    json_path = Path(json_path)
+    with open(json_path, "r") as f:
+        transcription = json.load(f)
+    save_transcription(path, transcription)
+    json_path.unlink(missing_ok=True)
+    logger.info(f"Migrated {json_path.name} to columnar cache {Path(path).name}")
+    return load_transcription(path)
@@ -0,0 +1,332 @@
+"""
+Pluggable speech-to-text engines for the transcriber.
+
+Every backend returns the same transcription dict the pipeline has always
+consumed:
+
+    {"text": str,
+     "words": [{"text", "start", "end", "confidence"}, ...],
+     "segments": [{"start", "end", "text"}, ...],
+     "language": str,
+     "duration": float}
+
+with times in seconds.  Caching lives in transcriber and is shared by all
+backends; each backend's cache_tag keeps their entries apart.
+
+Backends:
+    - "assemblyai": the hosted AssemblyAI API (default)
+    - "fixture": deterministic offline transcripts for tests and benchmarks
+    - "whisper": local openai-whisper on the CPU (optional dependency)
+"""
+
+import json
+import os
+import random
+import shutil
+import tempfile
+import logging
+import threading
+from pathlib import Path
+from typing import BinaryIO, Protocol, runtime_checkable
+
+try:
+    from audio_processor import probe_duration
+except ImportError:
+    # Fallback for when running as module
+    from scripts.audio_processor import probe_duration
+
+logger = logging.getLogger(__name__)
+
+# Backend used when none is requested explicitly
+DEFAULT_BACKEND = os.getenv("TRANSCRIPTION_BACKEND", "assemblyai")
+
+# Words grouped into one segment when a backend has no sentence boundaries
+_FALLBACK_SEGMENT_SECONDS = 8.0
+
+# Backends built by get_backend, keyed by name and constructor arguments
+_instances: dict[tuple, "TranscriptionBackend"] = {}
+_instances_lock = threading.Lock()
+
+
+@runtime_checkable
+class TranscriptionBackend(Protocol):
+    """A speech-to-text engine producing word-timestamped transcriptions."""
+
+    # Distinguishes this backend's cache entries ("" for the default backend,
+    # so caches written before backends existed stay valid)
+    cache_tag: str
+
+    def transcribe(self, audio: str | Path | BinaryIO, name: str = "audio") -> dict:
+        """Transcribes an audio file path or readable binary stream."""
+        ...
+
+
+class AssemblyAIBackend:
+    """
+    AssemblyAI's hosted API, with word-level timestamps.
+
+    Args:
+        api_key: AssemblyAI API key (if None, reads from ASSEMBLYAI_API_KEY env var)
+    """
+
+    cache_tag = ""
+
+    def __init__(self, api_key: str | None = None):
+        self.api_key = api_key
+
+    def transcribe(self, audio: str | Path | BinaryIO, name: str = "audio") -> dict:
+        import assemblyai as aai
+
+        # Get API key
+        api_key = self.api_key
+        if api_key is None:
+            api_key = os.getenv("ASSEMBLYAI_API_KEY")
+            if not api_key:
+                raise ValueError("ASSEMBLYAI_API_KEY not found in environment variables")
+
+        print(f"Transcribing {name} with AssemblyAI...")
+        aai.settings.api_key = api_key
+
+        # Configure speech models explicitly (required by latest AssemblyAI SDK)
+        # Use routing: try universal-3-pro first (highest accuracy), then universal-2 (broad language support)
+        config = aai.TranscriptionConfig(
+            speech_models=["universal-3-pro", "universal-2"]
+        )
+
+        transcriber = aai.Transcriber(config=config)
+        transcript = transcriber.transcribe(str(audio) if isinstance(audio, Path) else audio)
+
+        if transcript.status == aai.TranscriptStatus.error:
+            raise Exception(f"Transcription failed: {transcript.error}")
+
+        # Extract word timestamps (AssemblyAI returns in milliseconds)
+        words = []
+        for word in transcript.words:
+            words.append({
+                "text": word.text,
+                "start": word.start / 1000.0,  # Convert ms to seconds
+                "end": word.end / 1000.0,
+                "confidence": word.confidence
+            })
+
+        # Extract segments (for compatibility with existing code)
+        # Use sentences as segments, or create segments from words
+        if hasattr(transcript, 'get_sentences'):
+            segments = [
+                {
+                    "start": sentence.start / 1000.0,
+                    "end": sentence.end / 1000.0,
+                    "text": sentence.text
+                }
+                for sentence in transcript.get_sentences()
+            ]
+        else:
+            segments = _segments_from_words(words)
+
+        # Build result dict (compatible with Whisper format)
+        return {
+            "text": transcript.text,
+            "words": words,
+            "segments": segments,
+            "language": transcript.language_code if hasattr(transcript, 'language_code') else "en",
+            "duration": words[-1]["end"] if words else 0.0
+        }
+
+
+class FixtureBackend:
+    """
+    Deterministic offline backend for tests, load tests and benchmarks.
+
+    With *fixture* it replays a saved transcription (any JSON file in the
+    transcription dict shape, e.g. a real transcript captured once).
+    Otherwise it generates a synthetic transcript spanning the audio's real
+    duration, so downstream stages run at realistic scale.  The same input
+    and seed always produce the same output.
+
+    Args:
+        fixture: Optional path to a transcription JSON file to replay.
+        words_per_second: Speech rate of synthetic transcripts.
+        duration: Overrides the audio duration (needed for streams, which
+                  are drained but not decoded).
+        seed: Seed for the synthetic word sequence.
+    """
+
+    cache_tag = "fixture"
+
+    # Synthetic transcripts draw from this many distinct words
+    _VOCABULARY_SIZE = 2000
+
+    def __init__(
+        self,
+        fixture: str | Path | None = None,
+        words_per_second: float = 2.5,
+        duration: float | None = None,
+        seed: int = 0,
+    ):
+        self.fixture = Path(fixture) if fixture else None
+        self.words_per_second = words_per_second
+        self.duration = duration
+        self.seed = seed
+        if self.fixture:
+            self.cache_tag = f"fixture-{self.fixture.stem}"
+
+    def transcribe(self, audio: str | Path | BinaryIO, name: str = "audio") -> dict:
+        if self.fixture:
+            with open(self.fixture, "r") as f:
+                return json.load(f)
+
+        duration = self.duration
+        if hasattr(audio, "read"):
+            # Drain streams so their producer finishes and any hash completes
+            for _ in iter(lambda: audio.read(1024 * 1024), b""):
+                pass
+            duration = duration if duration is not None else 60.0
+        elif duration is None:
+            duration = probe_duration(audio)
+
+        rng = random.Random(self.seed)
+        vocabulary = [f"word{i}" for i in range(self._VOCABULARY_SIZE)]
+        step = 1.0 / self.words_per_second
+        words = []
+        t = 0.0
+        while t + step <= duration:
+            words.append({
+                "text": rng.choice(vocabulary),
+                "start": round(t, 3),
+                "end": round(t + step * 0.8, 3),
+                "confidence": 0.95,
+            })
+            t += step
+
+        return {
+            "text": " ".join(w["text"] for w in words),
+            "words": words,
+            "segments": _segments_from_words(words),
+            "language": "en",
+            "duration": words[-1]["end"] if words else 0.0
+        }
+
+
+class WhisperBackend:
+    """
+    Local openai-whisper transcription, for offline runs.
+
+    Requires the optional ``openai-whisper`` package; the model is loaded on
+    first use and reused afterwards (get_backend hands out one instance per
+    model and device).  Loading and inference are serialized by a lock, as
+    whisper's decoder installs per-call hooks on the shared model, so
+    chunks transcribed from several threads take turns.
+
+    Args:
+        model_name: Whisper model size ("tiny", "base", "small", ...).
+        device: Torch device to run on.
+    """
+
+    def __init__(self, model_name: str = "base", device: str = "cpu"):
+        self.model_name = model_name
+        self.device = device
+        self.cache_tag = f"whisper-{model_name}"
+        self._model = None
+        self._lock = threading.Lock()
+
+    def transcribe(self, audio: str | Path | BinaryIO, name: str = "audio") -> dict:
+        try:
+            import whisper
+        except ImportError as e:
+            raise RuntimeError("The whisper backend requires the openai-whisper package") from e
+
+        if hasattr(audio, "read"):
+            # whisper decodes from a path, so spool streams to a temp file
+            with tempfile.NamedTemporaryFile(suffix=Path(name).suffix) as tmp:
+                shutil.copyfileobj(audio, tmp)
+                tmp.flush()
+                result = self._run(whisper, tmp.name, name)
+        else:
+            result = self._run(whisper, str(audio), name)
+
+        words = []
+        segments = []
+        for segment in result["segments"]:
+            segments.append({"start": segment["start"], "end": segment["end"], "text": segment["text"].strip()})
+            for word in segment.get("words", []):
+                words.append({
+                    "text": word["word"].strip(),
+                    "start": word["start"],
+                    "end": word["end"],
+                    "confidence": word.get("probability", 1.0),
+                })
+
+        return {
+            "text": result["text"].strip(),
+            "words": words,
+            "segments": segments,
+            "language": result.get("language", "en"),
+            "duration": words[-1]["end"] if words else 0.0
+        }
+
+    def _run(self, whisper, audio_path: str, name: str) -> dict:
+        """Loads the model once and transcribes *audio_path*, one call at a time."""
+        with self._lock:
+            if self._model is None:
+                logger.info(f"Loading whisper model {self.model_name} on {self.device}...")
+                self._model = whisper.load_model(self.model_name, device=self.device)
+
+            print(f"Transcribing {name} with whisper ({self.model_name})...")
+            return self._model.transcribe(audio_path, word_timestamps=True, fp16=False)
+
+
+BACKENDS = {
+    "assemblyai": AssemblyAIBackend,
+    "fixture": FixtureBackend,
+    "whisper": WhisperBackend,
+}
+
+
+def get_backend(backend: str | TranscriptionBackend | None = None, **kwargs) -> TranscriptionBackend:
+    """
+    Resolves a backend name (see BACKENDS) or instance.
+
+    None selects DEFAULT_BACKEND (the TRANSCRIPTION_BACKEND env var, or
+    "assemblyai").  Keyword arguments are passed to the backend constructor.
+    Instances are memoized per name and arguments for the life of the
+    process, so expensive state such as a loaded whisper model is shared by
+    every job.
+    """
+    if backend is None:
+        backend = DEFAULT_BACKEND
+    if not isinstance(backend, str):
+        return backend
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown transcription backend: {backend!r} (expected one of {list(BACKENDS)})")
+
+    key = (backend, tuple(sorted(kwargs.items())))
+    with _instances_lock:
+        instance = _instances.get(key)
+        if instance is None:
+            instance = _instances[key] = BACKENDS[backend](**kwargs)
+    return instance
+
+
+def _segments_from_words(words: list[dict]) -> list[dict]:
+    """Groups words into ~_FALLBACK_SEGMENT_SECONDS segments."""
+    segments = []
+    current_segment_words = []
+    current_start = None
+
+    for word in words:
+        if current_start is None:
+            current_start = word["start"]
+
+        current_segment_words.append(word)
+
+        # Create segment when we hit ~8 seconds or end of words
+        if word["end"] - current_start >= _FALLBACK_SEGMENT_SECONDS or word is words[-1]:
+            segments.append({
+                "start": current_start,
+                "end": word["end"],
+                "text": " ".join(w["text"] for w in current_segment_words)
+            })
+            current_segment_words = []
+            current_start = None
+
+    return segments
@@ -1,12 +1,137 @@
+import os
+import json
+import time
+import fcntl
+import random
 import subprocess
 import shutil
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache, partial
 from pathlib import Path
 
 from scripts.subtitle_generator import generate_ass
 
 logger = logging.getLogger(__name__)
 
+# Threads given to each libx264 encode. Clips are rendered in parallel, so the
+# default worker count is the number of cores divided by this.
+X264_THREADS = 4
+
+
+def default_render_workers() -> int:
+    """Number of segments rendered concurrently when no worker count is given."""
+    return max(1, (os.cpu_count() or 1) // X264_THREADS)
+
+
+# Render modes for clip_video_segments
+RENDER_MODE_SEGMENTS = "segments"              # one ffmpeg per segment, then concat
+RENDER_MODE_FILTER_COMPLEX = "filter_complex"  # one ffmpeg, single filter graph
+RENDER_MODE_SMART_CUT = "smart_cut"            # stream-copy whole GOPs, uncaptioned only
+RENDER_MODES = (RENDER_MODE_SEGMENTS, RENDER_MODE_FILTER_COMPLEX, RENDER_MODE_SMART_CUT)
+
+# Codecs the re-encoded boundary pieces are written in; smart_cut only
+# stream-copies sources that already use them, so the pieces concatenate.
+_SMART_CUT_CODECS = ("h264", "aac")
+
+# Source H.264 profiles (as ffprobe names them) mapped to the libx264 profile
+# that encodes boundary pieces the source's decoder setup can also play
+_X264_PROFILES = {
+    "Constrained Baseline": "baseline",
+    "Baseline": "baseline",
+    "Main": "main",
+    "High": "high",
+}
+
+# Pixel formats libx264 encodes in the profiles above
+_SMART_CUT_PIX_FMTS = ("yuv420p", "yuvj420p")
+
+# Boundary pieces use a preset with CABAC, B-frames and 8x8 transforms, so
+# libx264 signals the requested profile rather than Constrained Baseline
+_SMART_CUT_PRESET = "veryfast"
+
+# smart_cut pieces are muxed as MPEG-TS: H.264 in Annex-B with parameter sets
+# in-band, so pieces from different encoders can be spliced and each one is
+# decoded with its own SPS/PPS
+_SMART_CUT_PIECE_SUFFIX = ".ts"
+
+# Boundary pieces shorter than this are dropped instead of re-encoded
+_MIN_PIECE_SECONDS = 0.001
+
+# Containers whose index (moov atom) is moved to the front of finished clips,
+# so players can start and seek before the download completes
+_FASTSTART_SUFFIXES = (".mp4", ".m4v", ".mov")
+
+# Host-wide cap on concurrently running ffmpeg render processes, shared by
+# every clip_video_segments call in every process (every highlight set, and
+# every job across the server's worker processes) through lock files in
+# FFMPEG_SLOTS_DIR (by default under the server's work directory).  Audio
+# extraction (audio_processor) is not counted.
+MAX_FFMPEG_PROCESSES = int(os.getenv("MAX_FFMPEG_PROCESSES", default_render_workers()))
+FFMPEG_SLOTS_DIR = Path(os.getenv("FFMPEG_SLOTS_DIR", "/tmp/longform_shorts/ffmpeg_slots"))
+
+# Seconds between attempts to take a slot while all of them are held
+_SLOT_POLL_SECONDS = 0.1
+
+
+class _ProcessSlots:
+    """
+    Counting semaphore shared by threads and processes through flock.
+
+    Slot k is the file slot_<k>.lock in *directory*, and holding it means
+    holding an exclusive flock on it.  flock belongs to the open file, so
+    threads of one process compete for slots just like separate processes,
+    and the kernel frees the slots of a process that dies.
+
+    Args:
+        directory: Where the slot files live (created on first use).
+        count: Number of slots.
+    """
+
+    def __init__(self, directory: str | Path, count: int):
+        self.directory = Path(directory)
+        self.count = max(1, count)
+
+    @contextmanager
+    def acquire(self):
+        """Holds one slot for the duration of the with block."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        while True:
+            for slot in range(self.count):
+                slot_file = open(self.directory / f"slot_{slot}.lock", "w")
+                try:
+                    fcntl.flock(slot_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    slot_file.close()
+                    continue
+                try:
+                    yield
+                finally:
+                    # Closing the file releases the lock
+                    slot_file.close()
+                return
+            # Jitter so waiters in different processes don't retry in lockstep
+            time.sleep(_SLOT_POLL_SECONDS * random.uniform(0.5, 1.5))
+
+
+_ffmpeg_slots = _ProcessSlots(FFMPEG_SLOTS_DIR, MAX_FFMPEG_PROCESSES)
+
+
+def _faststart_options(output_path: Path) -> list[str]:
+    """ffmpeg output options for a finished clip (not intermediate pieces)."""
+    return ["-movflags", "+faststart"] if output_path.suffix.lower() in _FASTSTART_SUFFIXES else []
+
+
+def _run_ffmpeg(command: list[str], **kwargs) -> subprocess.CompletedProcess:
+    """Runs an ffmpeg command once a process slot is free."""
+    with _ffmpeg_slots.acquire():
+        return subprocess.run(
+            command, check=True,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            **kwargs,
+        )
+
 
 def clip_video_segments(
     video_path: str,
@@ -14,10 +139,16 @@ def clip_video_segments(
     output_file: str,
     padding: float = 0.0,
     words: list[dict] | None = None,
+    max_workers: int | None = None,
+    render_mode: str = RENDER_MODE_SEGMENTS,
 ) -> Path:
     """
     Clips multiple segments from a video and concatenates them into a single file.
     When *words* are provided, viral-style ASS captions are burned into each clip.
+    Segments are encoded concurrently by a bounded worker pool, then joined in order.
+    Alternatively, render_mode="filter_complex" builds the whole highlight in a
+    single ffmpeg process, from one seeked input per segment joined by a
+    concat filter graph.
 
     Args:
         video_path: Path to the source video file.
@@ -27,6 +158,14 @@ def clip_video_segments(
         words: Optional list of word dicts (text/start/end/confidence) from
                the transcriber.  When provided, ASS captions are generated
                and burned into each clip via FFmpeg's ass= video filter.
+        max_workers: Number of segments encoded at once.  Defaults to
+               default_render_workers() (cores // X264_THREADS).
+        render_mode: RENDER_MODE_SEGMENTS (default) encodes each segment in
+               its own ffmpeg process and concatenates the results;
+               RENDER_MODE_FILTER_COMPLEX decodes and encodes once, with no
+               intermediate clip files; RENDER_MODE_SMART_CUT (uncaptioned
+               clips only) stream-copies the GOPs fully inside each segment
+               and re-encodes only the partial GOPs at its edges.
 
     Returns:
         Path: The path to the created output file.
@@ -38,6 +177,13 @@ def clip_video_segments(
     if not segments:
         raise ValueError("No segments provided for clipping.")
 
+    if render_mode not in RENDER_MODES:
+        raise ValueError(f"Unknown render mode: {render_mode!r} (expected one of {RENDER_MODES})")
+
+    if render_mode == RENDER_MODE_SMART_CUT and words:
+        logger.warning("smart_cut cannot burn captions; rendering captioned clips with the segments mode")
+        render_mode = RENDER_MODE_SEGMENTS
+
     output_file_path = Path(output_file)
     output_file_path.parent.mkdir(parents=True, exist_ok=True)
 
@@ -47,10 +193,10 @@ def clip_video_segments(
         shutil.rmtree(temp_dir)
     temp_dir.mkdir(parents=True, exist_ok=True)
 
-    clipped_paths = []
+    render_jobs = []
 
     try:
-        # 1. Generate individual clips
+        # 1. Collect individual clips to render
         for i, (start, end) in enumerate(segments, 1):
             # Skip zero-duration segments to avoid ffmpeg errors
             try:
@@ -69,52 +215,31 @@ def clip_video_segments(
                 s_padded = start
                 e_padded = end
 
-            clip_filename = f"clip_{i}{video_path_obj.suffix}"
-            clip_path = temp_dir / clip_filename
-
-            # --- Build FFmpeg command ---
-            command = [
-                "ffmpeg", "-y",
-                "-ss", str(s_padded),
-                "-t", str(max(0.1, e_val - s_val)),
-                "-i", str(video_path_obj),
-            ]
-
-            # If words supplied, generate ASS and burn into the video
-            if words:
-                ass_filename = f"clip_{i}.ass"
-                ass_path = temp_dir / ass_filename
-                generate_ass(words, s_padded, e_padded, ass_path)
-
-                # Burn captions using the ass= video filter
-                command += [
-                    "-vf", f"ass={ass_filename}",
-                ]
-                logger.info(f"  Burning ASS captions into clip {i} from {ass_filename}")
-
-            command += [
-                "-map", "0:v",
-                "-map", "0:a",
-                "-map_metadata", "-1",
-                "-c:v", "libx264",
-                "-preset", "ultrafast",
-                "-c:a", "aac",
-                str(clip_path),
-            ]
-
-            # Run with cwd=temp_dir so the ass= filter resolves the
-            # ASS filename without needing absolute-path escaping.
-            subprocess.run(
-                command, check=True,
-                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
-                cwd=str(temp_dir),
-            )
-            clipped_paths.append(clip_path)
+            render_jobs.append((i, s_padded, e_padded, max(0.1, e_val - s_val)))
+
+        if render_mode == RENDER_MODE_FILTER_COMPLEX:
+            if not render_jobs:
+                raise ValueError("No valid clips (duration > 0) were generated from the provided segments.")
+            _render_filter_complex(video_path_obj, temp_dir, render_jobs, output_file_path, words=words)
+            return output_file_path
+
+        # 2. Render the clips concurrently; results keep segment order
+        concat_options = []
+        if render_mode == RENDER_MODE_SMART_CUT:
+            pieces, concat_options = _plan_smart_cut(video_path_obj, temp_dir, render_jobs, output_file_path)
+        else:
+            pieces = [partial(_render_segment, video_path_obj, temp_dir, *job, words=words) for job in render_jobs]
+
+        workers = max(1, min(max_workers or default_render_workers(), len(pieces) or 1))
+        logger.info(f"  Rendering {len(pieces)} clip(s) with {workers} worker(s)")
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(piece) for piece in pieces]
+            clipped_paths = [future.result() for future in futures]
 
         if not clipped_paths:
             raise ValueError("No valid clips (duration > 0) were generated from the provided segments.")
 
-        # 2. Create concat list
+        # 3. Create concat list
         concat_list_path = temp_dir / "concat_list.txt"
         with open(concat_list_path, "w") as f:
             for clip_path in clipped_paths:
@@ -122,7 +247,7 @@ def clip_video_segments(
                 safe_path = str(clip_path.resolve()).replace("'", "'\\''")
                 f.write(f"file '{safe_path}'\n")
 
-        # 3. Concatenate
+        # 4. Concatenate
         command_concat = [
             "ffmpeg", "-y",
             "-f", "concat",
@@ -130,10 +255,12 @@ def clip_video_segments(
             "-i", str(concat_list_path),
             "-map", "0",     # Map all streams (video, audio)
             "-c", "copy",
+            *concat_options,
+            *_faststart_options(output_file_path),
             str(output_file_path),
         ]
 
-        subprocess.run(command_concat, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        _run_ffmpeg(command_concat)
 
         return output_file_path
 
@@ -141,3 +268,337 @@ def clip_video_segments(
         if temp_dir.exists():
             shutil.rmtree(temp_dir)
 
+
+def _render_segment(
+    video_path_obj: Path,
+    temp_dir: Path,
+    i: int | str,
+    s_padded: str | float,
+    e_padded: str | float,
+    duration: float,
+    words: list[dict] | None = None,
+    encode_options: list[str] | None = None,
+    suffix: str | None = None,
+) -> Path:
+    """
+    Encodes one segment into temp_dir/clip_<i>, burning in its own ASS captions.
+
+    Runs inside a render worker, so the ASS file is generated here as well.
+    *encode_options* replace the default libx264/aac output options and
+    *suffix* the source's container (smart_cut uses both for its pieces).
+
+    Returns:
+        Path: The path to the rendered clip.
+    """
+    clip_filename = f"clip_{i}{suffix or video_path_obj.suffix}"
+    clip_path = temp_dir / clip_filename
+
+    # --- Build FFmpeg command ---
+    command = [
+        "ffmpeg", "-y",
+        "-ss", str(s_padded),
+        "-t", str(duration),
+        "-i", str(video_path_obj),
+    ]
+
+    # If words supplied, generate ASS and burn into the video
+    if words:
+        ass_filename = f"clip_{i}.ass"
+        ass_path = temp_dir / ass_filename
+        generate_ass(words, s_padded, e_padded, ass_path)
+
+        # Burn captions using the ass= video filter
+        command += [
+            "-vf", f"ass={ass_filename}",
+        ]
+        logger.info(f"  Burning ASS captions into clip {i} from {ass_filename}")
+
+    command += [
+        "-map", "0:v",
+        "-map", "0:a",
+        "-map_metadata", "-1",
+        *(encode_options or [
+            "-c:v", "libx264",
+            "-preset", "ultrafast",
+            "-threads", str(X264_THREADS),
+            "-c:a", "aac",
+        ]),
+        str(clip_path),
+    ]
+
+    # Run with cwd=temp_dir so the ass= filter resolves the
+    # ASS filename without needing absolute-path escaping.
+    _run_ffmpeg(command, cwd=str(temp_dir))
+    return clip_path
+
+
+def _render_filter_complex(
+    video_path_obj: Path,
+    temp_dir: Path,
+    render_jobs: list[tuple[int, float, float, float]],
+    output_file_path: Path,
+    words: list[dict] | None = None,
+) -> Path:
+    """
+    Renders all segments in one ffmpeg process using a single filter graph.
+
+    Every segment is its own input, seeked and limited with -ss/-t exactly
+    like the multi-process path, so the decoder only touches the segments
+    and never the gaps between them.  Each input is rebased with
+    setpts/asetpts, gets its own ass= overlay when *words* are given, and
+    the pieces are joined by the concat filter.
+
+    Returns:
+        Path: The path to the created output file.
+    """
+    inputs = []
+    filters = []
+    concat_inputs = []
+    for k, (i, s_padded, e_padded, duration) in enumerate(render_jobs):
+        inputs += ["-ss", str(s_padded), "-t", str(duration), "-i", str(video_path_obj)]
+        video_chain = f"[{k}:v]setpts=PTS-STARTPTS"
+        if words:
+            ass_filename = f"clip_{i}.ass"
+            generate_ass(words, s_padded, e_padded, temp_dir / ass_filename)
+            video_chain += f",ass={ass_filename}"
+        filters.append(f"{video_chain}[v{k}]")
+        filters.append(f"[{k}:a]asetpts=PTS-STARTPTS[a{k}]")
+        concat_inputs.append(f"[v{k}][a{k}]")
+
+    filters.append(f"{''.join(concat_inputs)}concat=n={len(render_jobs)}:v=1:a=1[outv][outa]")
+
+    command = [
+        "ffmpeg", "-y",
+        *inputs,
+        "-filter_complex", ";".join(filters),
+        "-map", "[outv]",
+        "-map", "[outa]",
+        "-map_metadata", "-1",
+        "-c:v", "libx264",
+        "-preset", "ultrafast",
+        "-c:a", "aac",
+        *_faststart_options(output_file_path),
+        str(output_file_path.resolve()),
+    ]
+
+    logger.info(f"  Rendering {len(render_jobs)} segment(s) in a single filter_complex pass")
+    # cwd=temp_dir lets the ass= filters resolve their bare filenames
+    _run_ffmpeg(command, cwd=str(temp_dir))
+    return output_file_path
+
+
+def probe_keyframes(video_path: str) -> list[float]:
+    """
+    Returns the sorted keyframe timestamps (seconds) of the first video stream.
+
+    Timestamps count from the container's start_time, like -ss and the
+    transcript's word times, so sources that don't start at zero (e.g.
+    MPEG-TS captures) line up with the segments being cut.
+
+    Reads packet flags with ffprobe, so nothing is decoded.  Results are
+    memoized per file (path, size and mtime), so several highlight sets cut
+    from one source only probe it once.
+    """
+    path = Path(video_path).resolve()
+    stat = path.stat()
+    return list(_probe_keyframes_cached(str(path), stat.st_size, stat.st_mtime_ns))
+
+
+@lru_cache(maxsize=32)
+def _probe_keyframes_cached(video_path: str, size: int, mtime_ns: int) -> tuple[float, ...]:
+    command = [
+        "ffprobe", "-v", "error",
+        "-select_streams", "v:0",
+        "-show_entries", "packet=pts_time,flags:format=start_time",
+        "-of", "csv=p=1",
+        video_path,
+    ]
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+
+    # Lines are "packet,<pts_time>,<flags>" and one "format,<start_time>"
+    start_time = 0.0
+    keyframes = []
+    for line in output.splitlines():
+        section, _, fields = line.partition(",")
+        if section == "format":
+            if fields not in ("", "N/A"):
+                start_time = float(fields)
+        elif section == "packet":
+            pts_time, _, flags = fields.partition(",")
+            if "K" in flags and pts_time not in ("", "N/A"):
+                keyframes.append(float(pts_time))
+    return tuple(sorted(k - start_time for k in keyframes))
+
+
+@lru_cache(maxsize=32)
+def _stream_params(video_path: str, size: int, mtime_ns: int) -> dict:
+    """
+    Returns the coding parameters of the first video and audio streams.
+
+    Keys are "video" and "audio", each a dict of ffprobe stream fields (or
+    None when the file has no such stream).
+    """
+    command = [
+        "ffprobe", "-v", "error",
+        "-show_entries",
+        "stream=codec_type,codec_name,profile,level,pix_fmt,width,height,time_base,sample_rate,channels",
+        "-of", "json",
+        video_path,
+    ]
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    streams = json.loads(output).get("streams", [])
+    first = {}
+    for stream in streams:
+        first.setdefault(stream.get("codec_type"), stream)
+    return {"video": first.get("video"), "audio": first.get("audio")}
+
+
+def _smart_cut_encode_options(params: dict) -> list[str] | None:
+    """
+    Output options that encode smart_cut pieces to match the source's streams.
+
+    Re-encoded pieces get the source's H.264 profile, level, pixel format
+    and resolution, SPS/PPS repeated before every keyframe, and the source's
+    AAC sample rate and channel layout, so they can be spliced between
+    stream-copied GOPs.
+
+    Returns:
+        The ffmpeg output options, or None if the source can't be matched.
+    """
+    video, audio = params.get("video"), params.get("audio")
+    if not video or not audio:
+        return None
+    if (video.get("codec_name"), audio.get("codec_name")) != _SMART_CUT_CODECS:
+        return None
+    profile = _X264_PROFILES.get(video.get("profile"))
+    level = video.get("level")
+    if (
+        profile is None
+        or video.get("pix_fmt") not in _SMART_CUT_PIX_FMTS
+        or not video.get("width") or not video.get("height")
+        # ffprobe reports level 3.1 as 31; anything below 1.0 (e.g. 1b) isn't settable
+        or not isinstance(level, int) or level < 10
+        or audio.get("profile") != "LC"
+        or not audio.get("sample_rate") or not audio.get("channels")
+    ):
+        return None
+    return [
+        "-c:v", "libx264",
+        "-preset", _SMART_CUT_PRESET,
+        "-threads", str(X264_THREADS),
+        "-profile:v", profile,
+        "-level:v", f"{level // 10}.{level % 10}",
+        "-pix_fmt", video["pix_fmt"],
+        "-s", f"{video['width']}x{video['height']}",
+        "-x264-params", "repeat-headers=1",
+        "-c:a", "aac",
+        "-ar", str(audio["sample_rate"]),
+        "-ac", str(audio["channels"]),
+    ]
+
+
+def _track_timescale_options(params: dict, output_path: Path) -> list[str]:
+    """Keeps the source's video time base in a finished MP4/MOV clip."""
+    _, _, denominator = ((params.get("video") or {}).get("time_base") or "").partition("/")
+    if not denominator.isdigit() or output_path.suffix.lower() not in _FASTSTART_SUFFIXES:
+        return []
+    return ["-video_track_timescale", denominator]
+
+
+def _plan_smart_cut(
+    video_path_obj: Path,
+    temp_dir: Path,
+    render_jobs: list[tuple[int, float, float, float]],
+    output_file_path: Path,
+) -> tuple[list[partial], list[str]]:
+    """
+    Splits each segment at its first and last inner keyframe.
+
+    The GOPs between those keyframes are stream-copied; the partial GOPs
+    before the first and after the last are re-encoded with options matching
+    the source (see _smart_cut_encode_options).  All pieces are written as
+    MPEG-TS, whose in-band parameter sets let the concatenated stream switch
+    between the source's and libx264's SPS/PPS.  Segments without two inner
+    keyframes are re-encoded whole the same way, and sources whose streams
+    can't be matched fall back to re-encoding every segment.
+
+    Returns:
+        tuple: One render callable per piece, in playback order, and extra
+        output options for concatenating them into *output_file_path*.
+    """
+    stat = video_path_obj.stat()
+    params = _stream_params(str(video_path_obj), stat.st_size, stat.st_mtime_ns)
+    encode_options = _smart_cut_encode_options(params)
+    if encode_options is None:
+        video, audio = params.get("video") or {}, params.get("audio") or {}
+        logger.warning(
+            f"  smart_cut can't match the source's streams "
+            f"({video.get('codec_name')} {video.get('profile')} {video.get('pix_fmt')}, "
+            f"{audio.get('codec_name')} {audio.get('profile')}); re-encoding segments"
+        )
+        return [partial(_render_segment, video_path_obj, temp_dir, *job) for job in render_jobs], []
+
+    encode = partial(_render_segment, encode_options=encode_options, suffix=_SMART_CUT_PIECE_SUFFIX)
+    keyframes = probe_keyframes(str(video_path_obj))
+    pieces = []
+    copied = 0.0
+    for i, s_padded, _, duration in render_jobs:
+        start = float(s_padded)
+        end = start + duration
+        inner = [k for k in keyframes if start <= k <= end]
+
+        if len(inner) < 2:
+            pieces.append(partial(encode, video_path_obj, temp_dir, i, start, end, duration))
+            continue
+
+        first_key, last_key = inner[0], inner[-1]
+        if first_key - start >= _MIN_PIECE_SECONDS:
+            pieces.append(partial(
+                encode, video_path_obj, temp_dir, f"{i}_head", start, first_key, first_key - start
+            ))
+        pieces.append(partial(_copy_segment, video_path_obj, temp_dir, f"{i}_body", first_key, last_key - first_key))
+        if end - last_key >= _MIN_PIECE_SECONDS:
+            pieces.append(partial(
+                encode, video_path_obj, temp_dir, f"{i}_tail", last_key, end, end - last_key
+            ))
+        copied += last_key - first_key
+
+    total = sum(duration for *_, duration in render_jobs)
+    logger.info(f"  smart_cut: stream-copying {copied:.1f}s of {total:.1f}s")
+    return pieces, _track_timescale_options(params, output_file_path)
+
+
+def _copy_segment(
+    video_path_obj: Path,
+    temp_dir: Path,
+    label: str,
+    keyframe_start: float,
+    duration: float,
+) -> Path:
+    """
+    Stream-copies [keyframe_start, keyframe_start + duration) without re-encoding.
+
+    keyframe_start must be a keyframe, so input seeking lands on it exactly.
+
+    The piece is written as MPEG-TS (see _SMART_CUT_PIECE_SUFFIX), so its
+    H.264 is converted to Annex-B with SPS/PPS before every keyframe.
+
+    Returns:
+        Path: The path to the copied piece.
+    """
+    clip_path = temp_dir / f"clip_{label}{_SMART_CUT_PIECE_SUFFIX}"
+    command = [
+        "ffmpeg", "-y",
+        "-ss", str(keyframe_start),
+        "-t", str(duration),
+        "-i", str(video_path_obj),
+        "-map", "0:v",
+        "-map", "0:a",
+        "-map_metadata", "-1",
+        "-c", "copy",
+        "-bsf:v", "h264_mp4toannexb",
+        "-avoid_negative_ts", "make_zero",
+        str(clip_path),
+    ]
+    _run_ffmpeg(command, cwd=str(temp_dir))
+    return clip_path
@@ -5,131 +5,445 @@ This module matches LLM-extracted phrases to word sequences in the transcript,
 providing precise timestamps for video clipping.
 """
 
+import math
+from collections import OrderedDict, deque
 from difflib import SequenceMatcher
 
+import numpy as np
+
+try:
+    from transcript_store import as_word_table
+except ImportError:
+    # Fallback for when running as module
+    from scripts.transcript_store import as_word_table
+
+# Fraction of phrase words that must line up for a contiguous match
+_CONTIGUOUS_MATCH_RATIO = 0.8
+
+# Weights of the fuzzy fallback score (word overlap vs. character similarity)
+_OVERLAP_WEIGHT = 0.7
+_SIMILARITY_WEIGHT = 0.3
+
+# Minimum SequenceMatcher ratio for two words to count as the same word
+_WORD_SIMILARITY = 0.85
+
+# Histogram width used for the vectorized character-count bound
+_CHAR_BUCKETS = 64
+
+# Extra window sizes (beyond the phrase length) tried by the fuzzy fallback
+_FUZZY_EXTRA_WORDS = 5
+
+# Default number of phrase-word hit masks kept by WordHitCache (each is one
+# byte per transcript word)
+_HIT_CACHE_SIZE = 2048
+
+
+class WordHitCache:
+    """
+    Bounded LRU cache of per-word hit masks over one transcript.
+
+    A hit mask marks the transcript positions whose token is the same as,
+    or at least 85% similar to, a phrase word.  Computing it compares the
+    word against the whole vocabulary, so each distinct phrase word is
+    resolved once and reused by every phrase and highlight set matched
+    against the transcript; common words recur across phrases constantly.
+
+    Args:
+        maxsize: Maximum number of masks kept before evicting the least
+                 recently used
+    """
+
+    def __init__(self, maxsize: int = _HIT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, np.ndarray] = OrderedDict()
+
+    def get(self, word: str) -> np.ndarray | None:
+        """The cached mask for *word*, or None (counted as a miss)."""
+        mask = self._entries.get(word)
+        if mask is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(word)
+        return mask
+
+    def put(self, word: str, mask: np.ndarray) -> None:
+        self._entries[word] = mask
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        """Returns hit/miss counters and current size."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class TranscriptIndex:
+    """
+    Token index over a transcript's words.
+
+    Built once per transcription and shared by every phrase lookup.  Tokens
+    are encoded as integer IDs, and each phrase word's fuzzy hit mask (the
+    transcript positions _words_match would accept for it) is computed once
+    over the vocabulary and kept in a WordHitCache, so a phrase is only
+    scored against the windows that can match it, and the fuzzy fallback
+    can score all windows at once with NumPy.
+
+    Args:
+        words: List of word dicts with 'text', 'start', 'end', 'confidence'
+        hit_cache_size: Maximum number of hit masks kept (see WordHitCache)
+    """
+
+    def __init__(self, words: list[dict], hit_cache_size: int = _HIT_CACHE_SIZE):
+        self.words = words
+        # Columnar view used to build results without per-word lookups
+        self.table = as_word_table(words)
+        # Lowercased tokens, exactly as the scorers compare them
+        self.texts = self.table.texts()
+        self.lowered = [t.lower() for t in self.texts]
+        # Integer token IDs over the lowercased tokens, for vectorized scoring
+        type_ids: dict[str, int] = {}
+        self.token_ids = np.fromiter(
+            (type_ids.setdefault(t, len(type_ids)) for t in self.lowered),
+            dtype=np.int32,
+            count=len(self.lowered),
+        )
+        self.vocabulary = list(type_ids)
+        self.hit_cache = WordHitCache(hit_cache_size)
+        self._char_counts: np.ndarray | None = None
+        self._type_lengths: np.ndarray | None = None
+        self._hist_prefix: np.ndarray | None = None
+        self._length_prefix: np.ndarray | None = None
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def contiguous_candidates(self, phrase_words: list[str], max_misses: int) -> list[int]:
+        """
+        Start positions of the windows of len(phrase_words) that can pass _words_match.
+
+        Position k of a window matches when its token is in phrase word k's
+        token_hits mask, the same rule _words_match applies, so summing each
+        word's mask at its offset counts the matches of every window at once.
+        Windows with more than *max_misses* mismatched positions are dropped;
+        the rest are exactly the windows the full scan would accept.
+
+        Returns:
+            Sorted start positions
+        """
+        window_count = len(self.words) - len(phrase_words) + 1
+        if window_count <= 0:
+            return []
+        matches = np.zeros(window_count, dtype=np.int32)
+        for offset, word in enumerate(phrase_words):
+            matches += self.token_hits(word)[offset:offset + window_count]
+        return np.flatnonzero(matches >= len(phrase_words) - max_misses).tolist()
+
+    def token_hits(self, word: str) -> np.ndarray:
+        """
+        Boolean mask of transcript positions whose token matches *word*.
+
+        A token matches when it equals *word* or is at least 85% similar to
+        it, the same rule _words_match applies.  A vectorized
+        character-count bound over the whole vocabulary discards most
+        distinct tokens before SequenceMatcher runs, and the mask is cached.
+        """
+        mask = self.hit_cache.get(word)
+        if mask is None:
+            self._build_char_counts()
+            # Shared characters bound SequenceMatcher's matches, like quick_ratio()
+            shared = np.minimum(self._char_counts, _char_histograms([word])[0]).sum(axis=1)
+            bound_ok = 2 * shared >= _WORD_SIMILARITY * (self._type_lengths + len(word))
+            matching = [
+                type_id for type_id in np.flatnonzero(bound_ok)
+                if self.vocabulary[type_id] == word or _similar_enough(word, self.vocabulary[type_id])
+            ]
+            mask = np.isin(self.token_ids, np.asarray(matching, dtype=np.int32))
+            self.hit_cache.put(word, mask)
+        return mask
+
+    def similarity_bounds(self, phrase_clean: str, window_sizes: range) -> dict[int, np.ndarray]:
+        """
+        Upper bounds on SequenceMatcher(None, phrase_clean, window_text).ratio().
+
+        Window character histograms come from prefix sums over the token
+        histograms, so every window of one size is bounded in a single
+        vectorized step, the same bound quick_ratio() computes per pair.
+
+        Returns:
+            dict mapping window size to a float array indexed by window start
+        """
+        self._build_char_counts()
+        if self._hist_prefix is None:
+            self._hist_prefix = np.vstack((
+                np.zeros((1, _CHAR_BUCKETS), dtype=np.int32),
+                np.cumsum(self._char_counts[self.token_ids], axis=0, dtype=np.int32),
+            ))
+            self._length_prefix = np.concatenate(([0], np.cumsum(self._type_lengths[self.token_ids])))
+
+        phrase_hist = _char_histograms([phrase_clean])[0]
+        space = ord(" ") % _CHAR_BUCKETS
+        bounds = {}
+        for window_size in window_sizes:
+            window_hist = self._hist_prefix[window_size:] - self._hist_prefix[:-window_size]
+            window_hist[:, space] += window_size - 1
+            window_len = self._length_prefix[window_size:] - self._length_prefix[:-window_size] + window_size - 1
+            shared = np.minimum(window_hist, phrase_hist).sum(axis=1)
+            bounds[window_size] = 2.0 * shared / (window_len + len(phrase_clean))
+        return bounds
+
+    def _build_char_counts(self) -> None:
+        """Lazily builds the per-token character histograms used by the bounds."""
+        if self._char_counts is None:
+            self._char_counts = _char_histograms(self.vocabulary)
+            self._type_lengths = np.array([len(t) for t in self.vocabulary], dtype=np.int32)
+
+    def overlap_counts(self, phrase_words: list[str], window_sizes: range) -> dict[int, np.ndarray]:
+        """
+        Counts, for every window of every size, how many unique phrase words it contains.
+
+        Uses a prefix sum of each word's hit mask, so all windows of one size
+        are scored with a single vectorized subtraction.
+
+        Returns:
+            dict mapping window size to an int array indexed by window start
+        """
+        prefix = []
+        for word in dict.fromkeys(phrase_words):
+            mask = self.token_hits(word)
+            if mask.any():
+                prefix.append(np.concatenate(([0], np.cumsum(mask, dtype=np.int32))))
+        prefix = np.vstack(prefix) if prefix else np.zeros((0, len(self.words) + 1), dtype=np.int32)
+
+        counts = {}
+        for window_size in window_sizes:
+            present = (prefix[:, window_size:] - prefix[:, :-window_size]) > 0
+            counts[window_size] = present.sum(axis=0)
+        return counts
+
 
 def match_phrase_to_words(
     phrase: str,
     words: list[dict],
-    threshold: float = 0.8
+    threshold: float = 0.8,
+    index: TranscriptIndex | None = None,
 ) -> tuple[float, float, str] | None:
     """
     Matches a phrase to a sequence of words and returns precise timestamps.
-    
+
     Args:
         phrase: The phrase to match (from LLM output)
         words: List of word dicts with 'text', 'start', 'end', 'confidence'
         threshold: Minimum similarity ratio (0-1) to consider a match
-    
+        index: Optional TranscriptIndex built over *words*.  Pass one when
+               matching several phrases so the index is built only once;
+               otherwise one is built for this call.  Either way, only
+               windows that cannot match are skipped, so results equal a
+               full scan.
+
     Returns:
         tuple[float, float, str] | None: (start_time, end_time, matched_text)
         Returns None if no match found above threshold
     """
     phrase_clean = phrase.strip().lower()
     phrase_words = phrase_clean.split()
-    
+
     if not phrase_words or not words:
         return None
-    
-    # Try to find contiguous match first (exact or near-exact)
-    best_match = None
-    best_score = 0.0
-    
-    # Search for contiguous word sequence match
-    for i in range(len(words) - len(phrase_words) + 1):
-        # Try matching phrase_words to words[i:i+len(phrase_words)]
-        window_words = words[i:i + len(phrase_words)]
-        window_text = " ".join(w["text"].lower() for w in window_words)
-        
-        # Check if phrase words match window words
-        if _words_match(phrase_words, [w["text"].lower() for w in window_words]):
-            start_time = window_words[0]["start"]
-            end_time = window_words[-1]["end"]
-            matched_text = " ".join(w["text"] for w in window_words)
-            
-            # Calculate similarity score
-            similarity = SequenceMatcher(None, phrase_clean, window_text).ratio()
-            
-            if similarity > best_score:
-                best_score = similarity
-                best_match = (start_time, end_time, matched_text)
-    
-    # If we found a good match, return it
-    if best_match and best_score >= threshold:
-        return best_match
-    
-    # Fallback: fuzzy matching with word overlap
-    best_match = None
-    best_score = 0.0
-    
-    # Try sliding window approach with fuzzy matching
-    for window_size in range(len(phrase_words), min(len(phrase_words) + 5, len(words) + 1)):
-        for i in range(len(words) - window_size + 1):
-            window_words = words[i:i + window_size]
-            window_text = " ".join(w["text"].lower() for w in window_words)
-            
-            # Calculate word overlap ratio
-            overlap_ratio = _word_overlap_ratio(phrase_words, [w["text"].lower() for w in window_words])
-            similarity = SequenceMatcher(None, phrase_clean, window_text).ratio()
-            
-            # Combined score (weighted towards overlap)
-            combined_score = (overlap_ratio * 0.7) + (similarity * 0.3)
-            
-            if combined_score > best_score:
-                best_score = combined_score
-                start_time = window_words[0]["start"]
-                end_time = window_words[-1]["end"]
-                matched_text = " ".join(w["text"] for w in window_words)
-                best_match = (start_time, end_time, matched_text)
-    
-    if best_match and best_score >= threshold:
-        return best_match
-    
-    return None
+
+    if index is None:
+        index = TranscriptIndex(words)
+    elif index.words is not words:
+        raise ValueError("TranscriptIndex was built for a different word list")
+
+    return _match_phrase(phrase_clean, index, threshold)
 
 
 def match_phrases_to_words(
     phrases: list[str],
     words: list[dict],
-    threshold: float = 0.8
+    threshold: float = 0.8,
+    index: TranscriptIndex | None = None,
 ) -> list[tuple[float, float, str]]:
     """
     Matches multiple phrases to word sequences.
-    
+
     Args:
         phrases: List of phrases to match
         words: List of word dicts with timestamps
         threshold: Minimum similarity threshold
-    
+        index: Optional TranscriptIndex over *words*; built here if omitted
+
     Returns:
         list[tuple[float, float, str]]: List of (start, end, matched_text) tuples
     """
-    results = []
-    
-    for phrase in phrases:
-        match = match_phrase_to_words(phrase, words, threshold)
-        if match:
-            results.append(match)
+    return match_phrase_sets_to_words([phrases], words, threshold, index=index)[0]
+
+
+def match_phrase_sets_to_words(
+    phrase_sets: list[list[str]],
+    words: list[dict],
+    threshold: float = 0.8,
+    index: TranscriptIndex | None = None,
+) -> list[list[tuple[float, float, str]]]:
+    """
+    Matches several sets of phrases (e.g. one per LLM highlight set) in one pass.
+
+    Every distinct phrase across all sets goes into a single Aho-Corasick
+    automaton over lowercased tokens, and the transcript is swept once to
+    find their verbatim occurrences.  A phrase found verbatim resolves to
+    its first occurrence: that window scores a similarity of 1.0 on the
+    contiguous path, and ties keep the earliest start, so
+    match_phrase_to_words would return the same window.  Only the misses
+    (duplicates across sets once) go through contiguous and fuzzy scoring.
+
+    Args:
+        phrase_sets: One list of phrases per highlight set
+        words: List of word dicts with timestamps
+        threshold: Minimum similarity threshold
+        index: Optional TranscriptIndex over *words*; built here if omitted
+
+    Returns:
+        list[list[tuple[float, float, str]]]: (start, end, matched_text) tuples
+        for each set, in the same order as *phrase_sets*
+    """
+    if index is None:
+        index = TranscriptIndex(words)
+
+    # Matching only depends on the cleaned phrase, so each is matched once
+    unique_phrases = list(dict.fromkeys(
+        phrase.strip().lower() for phrases in phrase_sets for phrase in phrases
+    ))
+    patterns = [phrase.split() for phrase in unique_phrases]
+    automaton = _TokenAutomaton([
+        # Only a single-spaced phrase scores exactly 1.0 against its occurrence
+        p if phrase == " ".join(p) and threshold <= 1.0 else []
+        for phrase, p in zip(unique_phrases, patterns)
+    ])
+
+    first_occurrence: dict[int, int] = {}
+    for end, pattern_id in automaton.scan(index.lowered):
+        first_occurrence.setdefault(pattern_id, end - len(patterns[pattern_id]) + 1)
+
+    matches: dict[str, tuple[float, float, str] | None] = {}
+    for pattern_id, phrase_clean in enumerate(unique_phrases):
+        if pattern_id in first_occurrence:
+            matches[phrase_clean] = _window_result(index, len(patterns[pattern_id]), first_occurrence[pattern_id])
+        elif phrase_clean and len(index):
+            matches[phrase_clean] = _match_phrase(phrase_clean, index, threshold)
         else:
-            print(f"  [word_matcher] No match found for: \"{phrase[:60]}...\"")
-    
+            matches[phrase_clean] = None
+
+    results = []
+    for phrases in phrase_sets:
+        set_results = []
+        for phrase in phrases:
+            match = matches[phrase.strip().lower()]
+            if match:
+                set_results.append(match)
+            else:
+                print(f"  [word_matcher] No match found for: \"{phrase[:60]}...\"")
+        results.append(set_results)
+
     return results
 
 
+def _match_phrase(
+    phrase_clean: str,
+    index: TranscriptIndex,
+    threshold: float,
+) -> tuple[float, float, str] | None:
+    """match_phrase_to_words for a cleaned, non-empty phrase on an index."""
+    phrase_words = phrase_clean.split()
+
+    # Try to find contiguous match first (exact or near-exact)
+    max_misses = len(phrase_words) - math.ceil(len(phrase_words) * _CONTIGUOUS_MATCH_RATIO)
+    starts = index.contiguous_candidates(phrase_words, max_misses)
+
+    best = _best_contiguous_window(phrase_clean, phrase_words, index, starts, threshold)
+    if best is None:
+        # Fallback: fuzzy matching with word overlap
+        window_sizes = range(len(phrase_words), min(len(phrase_words) + _FUZZY_EXTRA_WORDS, len(index) + 1))
+        best = _best_fuzzy_window(phrase_clean, phrase_words, index, window_sizes, threshold)
+    if best is None:
+        return None
+
+    return _window_result(index, *best)
+
+
+class _TokenAutomaton:
+    """
+    Aho-Corasick automaton over token sequences.
+
+    Finds every occurrence of every pattern in a single left-to-right scan,
+    independent of the number of patterns.  Empty patterns are ignored.
+    """
+
+    def __init__(self, patterns: list[list[str]]):
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[int]] = [[]]
+
+        for pattern_id, tokens in enumerate(patterns):
+            if not tokens:
+                continue
+            node = 0
+            for token in tokens:
+                nxt = self._goto[node].get(token)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][token] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].append(pattern_id)
+
+        # Breadth-first pass sets failure links and inherits their outputs
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for token, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and token not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(token, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def scan(self, tokens: list[str]):
+        """Yields (end_position, pattern_id) for every occurrence in *tokens*."""
+        node = 0
+        for position, token in enumerate(tokens):
+            while node and token not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(token, 0)
+            for pattern_id in self._out[node]:
+                yield position, pattern_id
+
+
 def _words_match(phrase_words: list[str], window_words: list[str]) -> bool:
     """
     Check if phrase words match window words (allowing for minor differences).
-    
+
     Args:
         phrase_words: Words from the phrase
         window_words: Words from the window
-    
+
     Returns:
         bool: True if words match (with fuzzy tolerance)
     """
     if len(phrase_words) != len(window_words):
         return False
-    
+
     # Check if all words match (with fuzzy matching for minor differences)
     matches = 0
     for p_word, w_word in zip(phrase_words, window_words):
@@ -137,41 +451,145 @@ def _words_match(phrase_words: list[str], window_words: list[str]) -> bool:
         if p_word == w_word:
             matches += 1
         # Fuzzy match (for punctuation differences, etc.)
-        elif SequenceMatcher(None, p_word, w_word).ratio() >= 0.85:
+        elif _similar_enough(p_word, w_word):
             matches += 1
-    
+
     # Require at least 80% of words to match
-    return matches >= len(phrase_words) * 0.8
+    return matches >= len(phrase_words) * _CONTIGUOUS_MATCH_RATIO
 
 
-def _word_overlap_ratio(phrase_words: list[str], window_words: list[str]) -> float:
+def _best_contiguous_window(
+    phrase_clean: str,
+    phrase_words: list[str],
+    index: TranscriptIndex,
+    starts,
+    threshold: float,
+) -> tuple[int, int] | None:
     """
-    Calculate the ratio of phrase words found in window words.
-    
+    Finds the most similar same-length window that passes _words_match.
+
     Args:
-        phrase_words: Words from the phrase
-        window_words: Words from the window
-    
+        starts: Window start positions to check, in scan order
+
     Returns:
-        float: Ratio between 0 and 1
-    """
-    if not phrase_words:
-        return 0.0
-    
-    phrase_set = set(phrase_words)
-    window_set = set(window_words)
-    
-    # Count matches (including fuzzy matches)
-    matches = 0
-    for p_word in phrase_set:
-        # Check for exact match
-        if p_word in window_set:
-            matches += 1
-        else:
-            # Check for fuzzy match
-            for w_word in window_set:
-                if SequenceMatcher(None, p_word, w_word).ratio() >= 0.85:
-                    matches += 1
-                    break
-    
-    return matches / len(phrase_set)
+        (window_size, start) of the best window if its similarity reaches
+        *threshold*, else None.  Ties keep the earliest start.
+    """
+    best = None
+    best_score = 0.0
+    for i in starts:
+        # Try matching phrase_words to words[i:i+len(phrase_words)]
+        window_lowered = index.lowered[i:i + len(phrase_words)]
+
+        # Check if phrase words match window words
+        if _words_match(phrase_words, window_lowered):
+            # Calculate similarity score
+            similarity = SequenceMatcher(None, phrase_clean, " ".join(window_lowered)).ratio()
+
+            if similarity > best_score:
+                best_score = similarity
+                best = (len(phrase_words), i)
+
+    if best and best_score >= threshold:
+        return best
+    return None
+
+
+def _window_result(index: TranscriptIndex, window_size: int, start: int) -> tuple[float, float, str]:
+    """Builds the (start_time, end_time, matched_text) tuple for a window."""
+    stop = start + window_size
+    return (
+        float(index.table.start[start]),
+        float(index.table.end[stop - 1]),
+        " ".join(index.texts[start:stop]),
+    )
+
+
+def _char_histograms(tokens: list[str]) -> np.ndarray:
+    """
+    Per-token character counts, with code points folded into _CHAR_BUCKETS bins.
+
+    Folding only merges characters, so the shared-count of two histograms is
+    never lower than the true number of shared characters.
+    """
+    counts = np.zeros((len(tokens), _CHAR_BUCKETS), dtype=np.int16)
+    for row, token in enumerate(tokens):
+        for ch in token:
+            counts[row, ord(ch) % _CHAR_BUCKETS] += 1
+    return counts
+
+
+def _similar_enough(a: str, b: str) -> bool:
+    """
+    True if SequenceMatcher(None, a, b).ratio() >= 0.85.
+
+    The cheap length and character-multiset upper bounds are checked first,
+    so most non-matching pairs never reach the full ratio computation.
+    """
+    if 2 * min(len(a), len(b)) < _WORD_SIMILARITY * (len(a) + len(b)):
+        return False
+    matcher = SequenceMatcher(None, a, b)
+    return matcher.quick_ratio() >= _WORD_SIMILARITY and matcher.ratio() >= _WORD_SIMILARITY
+
+
+def _best_fuzzy_window(
+    phrase_clean: str,
+    phrase_words: list[str],
+    index: TranscriptIndex,
+    window_sizes: range,
+    threshold: float,
+) -> tuple[int, int] | None:
+    """
+    Finds the window with the best blended overlap/similarity score.
+
+    Overlap ratios and similarity upper bounds for all windows come from
+    vectorized prefix sums on the index, giving an upper bound on each
+    window's blended score.  Windows are visited best-bound first and
+    SequenceMatcher only runs until no remaining window can beat both the
+    threshold and the best score so far.  Ties keep the first window in
+    (window_size, start) order.
+
+    Returns:
+        (window_size, start) of the best window scoring at least *threshold*,
+        or None.
+    """
+    unique_count = len(set(phrase_words))
+    counts = index.overlap_counts(phrase_words, window_sizes)
+    similarity_bounds = index.similarity_bounds(phrase_clean, window_sizes)
+    if not counts:
+        return None
+
+    sizes = np.concatenate([np.full(len(c), size) for size, c in counts.items()])
+    starts = np.concatenate([np.arange(len(c)) for c in counts.values()])
+    overlaps = np.concatenate(list(counts.values()))
+    score_bounds = (
+        overlaps / unique_count * _OVERLAP_WEIGHT
+        + np.concatenate(list(similarity_bounds.values())) * _SIMILARITY_WEIGHT
+        + 1e-9
+    )
+    # Stable sort keeps (window_size, start) scan order within equal bounds
+    order = np.argsort(-score_bounds, kind="stable")
+
+    best = None
+    best_score = 0.0
+    for k in order:
+        # Windows scoring below the threshold can never be returned
+        if score_bounds[k] < max(best_score, threshold):
+            break
+
+        window_size, i = int(sizes[k]), int(starts[k])
+        window_text = " ".join(index.lowered[i:i + window_size])
+        overlap_ratio = int(overlaps[k]) / unique_count
+        similarity = SequenceMatcher(None, phrase_clean, window_text).ratio()
+
+        # Combined score (weighted towards overlap)
+        combined_score = (overlap_ratio * _OVERLAP_WEIGHT) + (similarity * _SIMILARITY_WEIGHT)
+
+        key = (window_size, i)
+        if combined_score > best_score or (combined_score == best_score and best and key < best):
+            best_score = combined_score
+            best = key
+
+    if best and best_score >= threshold:
+        return best
+    return None
@@ -4,11 +4,14 @@ Run with: uvicorn server.app:app --reload
 """
 
 import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 
-from server.routes.pipeline import router as pipeline_router
+from server.ingest import remove_partial_audio
+from server.jobs import server_process_lock
+from server.routes.pipeline import AUDIO_CACHE_DIR, WORK_BASE, job_queue, job_store, router as pipeline_router
 from server.routes.clips import router as clips_router
 
 # Load environment variables
@@ -21,10 +24,35 @@ logging.basicConfig(
     datefmt="%H:%M:%S",
 )
 
+logger = logging.getLogger(__name__)
+
+
+def _clean_up_previous_run() -> None:
+    # Jobs still pending from a previous run lost their worker processes
+    interrupted = job_store.fail_interrupted()
+    if interrupted:
+        logger.warning(f"Marked {interrupted} interrupted job(s) as failed")
+    # Uploads cut off by the restart may have left partially extracted audio
+    if AUDIO_CACHE_DIR.exists():
+        removed = remove_partial_audio(AUDIO_CACHE_DIR)
+        if removed:
+            logger.warning(f"Removed {removed} partial upload audio file(s)")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # With several server processes (uvicorn --workers), only the first one
+    # to start cleans up; the others would fail each other's live jobs
+    with server_process_lock(WORK_BASE / "server.lock", _clean_up_previous_run):
+        yield
+    job_queue.shutdown()
+
+
 app = FastAPI(
     title="Longform-to-Shorts API",
     description="API for extracting highlight clips from long-form videos",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS — allow all origins for local development
@@ -0,0 +1,255 @@
+"""
+Pipelined ingestion of multipart video uploads.
+
+FastAPI's UploadFile only becomes available once the whole request body has
+been spooled to a temporary file, and copying it to the job directory adds
+another full pass before ffmpeg can start.  ingest_upload instead parses the
+multipart body as it arrives: the video part is written to disk in large
+chunks and, when the container can be demuxed from a pipe (see
+pipe_streamable), teed into ffmpeg so audio extraction overlaps the
+transfer.  Otherwise the audio is extracted from the saved file afterwards,
+as before.
+"""
+
+import os
+import asyncio
+import logging
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from fastapi import HTTPException, Request
+
+try:
+    import python_multipart as multipart
+    from python_multipart.exceptions import FormParserError
+    from python_multipart.multipart import parse_options_header
+except ModuleNotFoundError:
+    # python-multipart < 0.0.13 installs the module as "multipart"
+    import multipart
+    from multipart.exceptions import FormParserError
+    from multipart.multipart import parse_options_header
+
+from scripts.audio_processor import PipedAudioExtraction, pipe_streamable
+
+logger = logging.getLogger(__name__)
+
+# Upload bytes are written to disk (and ffmpeg) in chunks of this size
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Give up on piping if the container layout is still unknown after this many
+# bytes (e.g. a huge box before moov); extraction then runs after the upload
+_MAX_PROBE_BYTES = 64 * 1024 * 1024
+
+# Largest accepted non-file form field
+_MAX_FIELD_BYTES = 64 * 1024
+
+# Name pattern of the WAVs piped extraction writes into the audio directory
+_PARTIAL_AUDIO_GLOB = "upload.*.tmp"
+
+
+@dataclass
+class IngestedUpload:
+    """
+    Result of ingest_upload.
+
+    Attributes:
+        video_path: Where the uploaded video was saved.
+        audio_path: WAV extracted while uploading, or None if extraction has
+                    to run on the saved file.
+        fields: The form's non-file fields.
+    """
+
+    video_path: Path
+    audio_path: Path | None = None
+    fields: dict[str, str] = field(default_factory=dict)
+
+
+class _VideoSink:
+    """Writes the video part to disk and, once the layout allows, to ffmpeg."""
+
+    def __init__(self, video_path: Path, audio_dir: Path):
+        self.video_path = video_path
+        self._file = open(video_path, "wb")
+        self._audio_dir = audio_dir
+        self._head: bytearray | None = bytearray()
+        self._extraction: PipedAudioExtraction | None = None
+
+    def write(self, chunk: bytes) -> None:
+        self._file.write(chunk)
+        if self._extraction is not None:
+            self._extraction.write(chunk)
+        elif self._head is not None:
+            self._head += chunk
+            streamable = pipe_streamable(self._head)
+            if streamable is None and len(self._head) < _MAX_PROBE_BYTES:
+                return
+            if streamable:
+                fd, tmp_name = tempfile.mkstemp(dir=self._audio_dir, prefix="upload.", suffix=".tmp")
+                os.close(fd)
+                try:
+                    self._extraction = PipedAudioExtraction(tmp_name)
+                except BaseException:
+                    os.remove(tmp_name)
+                    raise
+                self._extraction.write(bytes(self._head))
+            else:
+                logger.info(f"{self.video_path.name} cannot be demuxed while uploading; extracting afterwards")
+            self._head = None
+
+    def finish(self) -> Path | None:
+        self._file.close()
+        if self._extraction is None:
+            return None
+        audio_path = self._extraction.finish()
+        if audio_path is None:
+            logger.warning(f"Piped audio extraction failed for {self.video_path.name}; extracting afterwards")
+        return audio_path
+
+    def abort(self) -> None:
+        self._file.close()
+        if self._extraction is not None:
+            self._extraction.abort()
+
+
+def _upload_filename(filename: str) -> str:
+    """The client's file name made safe to save under: no directories, no "." or ".."."""
+    # Never trust client paths; keep only the file name
+    name = Path(filename).name
+    if name in ("", ".", "..") or "\0" in name:
+        return "upload.mp4"
+    return name
+
+
+def remove_partial_audio(audio_dir: Path) -> int:
+    """
+    Deletes WAVs left in *audio_dir* by piped extractions that never finished.
+
+    Only safe while no upload is being ingested, i.e. at server startup;
+    covers uploads cut off by a crash or restart.  Returns how many were
+    removed.
+    """
+    removed = 0
+    for path in audio_dir.glob(_PARTIAL_AUDIO_GLOB):
+        path.unlink(missing_ok=True)
+        removed += 1
+    return removed
+
+
+async def ingest_upload(
+    request: Request,
+    uploads_dir: Path,
+    audio_dir: Path,
+    file_field: str = "video",
+) -> IngestedUpload:
+    """
+    Receives a multipart/form-data upload, extracting audio while it arrives.
+
+    Args:
+        request: The incoming request.
+        uploads_dir: Directory to save the video file in.
+        audio_dir: Directory for the extracted WAV (the shared audio cache, so
+                   publish_extracted_audio can rename it into place).
+        file_field: Name of the form field carrying the video.
+
+    Returns:
+        IngestedUpload with the saved video, any extracted audio and the
+        remaining form fields.
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(status_code=400, detail="Expected a multipart/form-data upload")
+
+    audio_dir.mkdir(parents=True, exist_ok=True)
+    # Parser callbacks are synchronous; they queue events that the loop
+    # below acts on (with file I/O in a worker thread) after each chunk
+    events: list[tuple] = []
+    part = {"headers": {}, "name": b"", "value": b""}
+
+    def on_part_begin():
+        part.update(headers={}, name=b"", value=b"")
+
+    def on_header_field(data, start, end):
+        part["name"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        part["value"] += data[start:end]
+
+    def on_header_end():
+        part["headers"][part["name"].lower()] = part["value"]
+        part.update(name=b"", value=b"")
+
+    def on_headers_finished():
+        _, options = parse_options_header(part["headers"].get(b"content-disposition", b""))
+        name = options.get(b"name", b"").decode(errors="replace")
+        filename = options.get(b"filename")
+        events.append(("begin", name, filename.decode(errors="replace") if filename is not None else None))
+
+    def on_part_data(data, start, end):
+        events.append(("data", data[start:end]))
+
+    def on_part_end():
+        events.append(("end",))
+
+    parser = multipart.MultipartParser(params[b"boundary"], {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+
+    fields: dict[str, str] = {}
+    sink: _VideoSink | None = None
+    in_video = False
+    field_name: str | None = None
+    field_value = bytearray()
+    pending = bytearray()
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            for event in events:
+                if event[0] == "begin":
+                    _, name, filename = event
+                    in_video = name == file_field and filename is not None and sink is None
+                    if in_video:
+                        video_path = uploads_dir / _upload_filename(filename)
+                        sink = await asyncio.to_thread(_VideoSink, video_path, audio_dir)
+                    # Other file parts are ignored
+                    field_name = name if filename is None else None
+                    field_value.clear()
+                elif event[0] == "data":
+                    if in_video:
+                        pending += event[1]
+                    elif field_name is not None:
+                        field_value += event[1]
+                        if len(field_value) > _MAX_FIELD_BYTES:
+                            raise HTTPException(status_code=413, detail=f"Form field '{field_name}' is too large")
+                else:
+                    if field_name is not None:
+                        # Malformed text is the client's problem, not a 500
+                        fields[field_name] = field_value.decode(errors="replace")
+                    in_video = False
+                    field_name = None
+            events.clear()
+
+            if len(pending) >= UPLOAD_CHUNK_SIZE:
+                await asyncio.to_thread(sink.write, bytes(pending))
+                pending.clear()
+        parser.finalize()
+
+        if sink is None:
+            raise HTTPException(status_code=400, detail=f"Missing file field '{file_field}'")
+        if pending:
+            await asyncio.to_thread(sink.write, bytes(pending))
+    except BaseException as e:
+        if sink is not None:
+            await asyncio.to_thread(sink.abort)
+        if isinstance(e, FormParserError):
+            raise HTTPException(status_code=400, detail="Invalid multipart data") from e
+        raise
+
+    audio_path = await asyncio.to_thread(sink.finish)
+    return IngestedUpload(video_path=sink.video_path, audio_path=audio_path, fields=fields)
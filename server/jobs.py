@@ -0,0 +1,402 @@
+"""
+Background job subsystem for pipeline runs.
+
+Jobs are recorded in a small SQLite database and executed on a pool of
+worker processes, so long videos neither hold an HTTP request open nor
+compete with the event loop for the GIL.  Admission control caps how many
+jobs may be pending at once; beyond that, new submissions are rejected
+instead of piling up on the box.
+
+Job lifecycle: uploading -> queued -> running -> done | failed
+
+While a job runs, its worker appends run_pipeline's progress events to the
+store, where the server streams them to clients (GET /api/jobs/{id}/events).
+"""
+
+import os
+import json
+import time
+import fcntl
+import shutil
+import asyncio
+import logging
+import sqlite3
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import closing, contextmanager
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Worker processes executing pipeline jobs
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+
+# Jobs allowed to be uploading, queued or running at once; further
+# submissions are turned away (HTTP 429) until some finish
+MAX_PENDING_JOBS = int(os.getenv("MAX_PENDING_JOBS", JOB_WORKERS * 4))
+
+# Statuses that count against MAX_PENDING_JOBS
+ACTIVE_STATUSES = ("uploading", "queued", "running")
+
+# Statuses a job never leaves
+FINAL_STATUSES = ("done", "failed")
+
+
+class QueueFullError(Exception):
+    """Raised when admitting another job would exceed MAX_PENDING_JOBS."""
+
+
+class JobStore:
+    """
+    SQLite-backed job table, safe to use from several processes.
+
+    Every call opens a short-lived connection, so the store can be shared
+    by the server and its worker processes.
+
+    Args:
+        db_path: Path to the SQLite database file (created if missing).
+    """
+
+    def __init__(self, db_path: str | Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    params TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS job_events (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    job_id TEXT NOT NULL,
+                    event TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS job_events_by_job ON job_events (job_id, seq)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def reserve(self, job_id: str, max_pending: int = MAX_PENDING_JOBS) -> None:
+        """
+        Records a new job in the "uploading" state if there is room for it.
+
+        Raises:
+            QueueFullError: if max_pending jobs are already active.
+        """
+        with closing(self._connect()) as conn, conn:
+            # IMMEDIATE takes the write lock up front, so the count and the
+            # insert are atomic across processes
+            conn.execute("BEGIN IMMEDIATE")
+            (active,) = conn.execute(
+                f"SELECT COUNT(*) FROM jobs WHERE status IN ({','.join('?' * len(ACTIVE_STATUSES))})",
+                ACTIVE_STATUSES,
+            ).fetchone()
+            if active >= max_pending:
+                raise QueueFullError(f"{active} jobs already pending (limit {max_pending})")
+            conn.execute(
+                "INSERT INTO jobs (id, status, params, created_at) VALUES (?, 'uploading', '{}', ?)",
+                (job_id, time.time()),
+            )
+
+    def mark_queued(self, job_id: str, params: dict) -> None:
+        self._update(job_id, status="queued", params=json.dumps(params))
+
+    def mark_running(self, job_id: str) -> None:
+        self._update(job_id, status="running", started_at=time.time())
+
+    def mark_done(self, job_id: str, result: dict) -> None:
+        self._update(job_id, status="done", result=json.dumps(result), finished_at=time.time())
+
+    def mark_failed(self, job_id: str, error: str, result: dict | None = None) -> None:
+        self._update(
+            job_id,
+            status="failed",
+            error=error,
+            result=json.dumps(result) if result is not None else None,
+            finished_at=time.time(),
+        )
+
+    def fail_interrupted(self) -> int:
+        """Fails jobs left active by a previous server process; returns how many."""
+        with closing(self._connect()) as conn, conn:
+            cursor = conn.execute(
+                f"UPDATE jobs SET status = 'failed', error = 'Interrupted by server restart', finished_at = ? "
+                f"WHERE status IN ({','.join('?' * len(ACTIVE_STATUSES))})",
+                (time.time(), *ACTIVE_STATUSES),
+            )
+            return cursor.rowcount
+
+    def get(self, job_id: str) -> dict | None:
+        """The job as a dict (params/result decoded), or None if unknown."""
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def add_event(self, job_id: str, event: dict) -> int:
+        """Appends a progress event to the job; returns its sequence number."""
+        with closing(self._connect()) as conn, conn:
+            cursor = conn.execute(
+                "INSERT INTO job_events (job_id, event, created_at) VALUES (?, ?, ?)",
+                (job_id, json.dumps(event), time.time()),
+            )
+            return cursor.lastrowid
+
+    def events(self, job_id: str, after: int = 0) -> list[tuple[int, dict]]:
+        """The job's events with a sequence number above *after*, oldest first."""
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT seq, event FROM job_events WHERE job_id = ? AND seq > ? ORDER BY seq",
+                (job_id, after),
+            ).fetchall()
+        return [(seq, json.loads(event)) for seq, event in rows]
+
+    def _update(self, job_id: str, **columns) -> None:
+        assignments = ", ".join(f"{name} = ?" for name in columns)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*columns.values(), job_id))
+
+
+@contextmanager
+def server_process_lock(lock_path: str | Path, on_first_start=None):
+    """
+    Marks this process as a live server process for the with block.
+
+    Every server process (e.g. each of uvicorn's --workers) holds a shared
+    flock on *lock_path* while it runs, and the kernel drops it when the
+    process dies.  *on_first_start* runs only if no other server process
+    is alive, so cleaning up after a previous run (fail_interrupted,
+    partial uploads) never touches a sibling's live jobs.  It runs under
+    an exclusive lock, so siblings starting meanwhile wait for it.
+
+    Yields:
+        True if this process ran *on_first_start*.
+    """
+    lock_path = Path(lock_path)
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, "w") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            first = True
+        except BlockingIOError:
+            first = False
+        if first and on_first_start is not None:
+            on_first_start()
+        fcntl.flock(lock_file, fcntl.LOCK_SH)
+        yield first
+
+
+class JobQueue:
+    """
+    Runs jobs from a JobStore on a pool of worker processes.
+
+    Args:
+        store: Where job state is recorded.
+        workers: Number of worker processes.
+    """
+
+    def __init__(self, store: JobStore, workers: int = JOB_WORKERS):
+        self.store = store
+        self.workers = workers
+        self._pool: ProcessPoolExecutor | None = None
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn, not fork: the server process has an event loop and threads
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+        return self._pool
+
+    async def submit(self, job_id: str, params: dict) -> asyncio.Task:
+        """
+        Queues a reserved job for execution.
+
+        Store writes run in a thread: workers write events to the same
+        database, and a connection waiting on their lock must not stall the
+        event loop.
+
+        Args:
+            job_id: ID previously passed to JobStore.reserve.
+            params: Keyword arguments for run_job (JSON-serializable).
+
+        Returns:
+            Task resolving to the job's final record once it finishes.
+        """
+        await asyncio.to_thread(self.store.mark_queued, job_id, params)
+        loop = asyncio.get_running_loop()
+        try:
+            future = loop.run_in_executor(self._get_pool(), run_job, str(self.store.db_path), job_id, params)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed); start a fresh pool
+            self._pool = None
+            future = loop.run_in_executor(self._get_pool(), run_job, str(self.store.db_path), job_id, params)
+        task = asyncio.create_task(self._finish(job_id, future))
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+        return task
+
+    async def _finish(self, job_id: str, future: asyncio.Future) -> dict:
+        try:
+            result = await future
+        except Exception as e:
+            logger.error(f"[{job_id}] Job failed: {e}")
+            await asyncio.to_thread(self.store.mark_failed, job_id, str(e) or type(e).__name__)
+        else:
+            if result["status"] == "error" and not result["clips"]:
+                await asyncio.to_thread(
+                    self.store.mark_failed, job_id, "; ".join(result["errors"]) or "Pipeline failed", result
+                )
+            else:
+                await asyncio.to_thread(self.store.mark_done, job_id, result)
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+# Event loop of a worker process, reused by every job it runs so the shared
+# OpenAI client (see scripts.llm_client) keeps its connections between jobs
+_worker_loop: asyncio.AbstractEventLoop | None = None
+
+
+def _get_worker_loop() -> asyncio.AbstractEventLoop:
+    global _worker_loop
+    if _worker_loop is None or _worker_loop.is_closed():
+        _worker_loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_worker_loop)
+    return _worker_loop
+
+
+def _init_worker() -> None:
+    """Gives spawned worker processes the server's log format."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        datefmt="%H:%M:%S",
+    )
+
+
+def run_job(db_path: str, job_id: str, params: dict) -> dict:
+    """
+    Executes one pipeline job inside a worker process.
+
+    Runs run_pipeline on the uploaded video, records its progress events and
+    moves each clip to the shared clips directory as soon as it is rendered,
+    then removes the job's work directory.
+
+    Args:
+        db_path: JobStore database, used to mark the job running and record
+                 its events.
+        job_id: The job being run.
+        params: run_pipeline keyword arguments plus "clips_dir", the shared
+                directory clips are published to.
+
+    Returns:
+        {"status", "clips": [{"download_url", "filename", "segments"}], "errors"}
+    """
+    from scripts.pipeline import run_pipeline
+
+    store = JobStore(db_path)
+    store.mark_running(job_id)
+    params = dict(params)
+    clips_dir = Path(params.pop("clips_dir"))
+    work_dir = Path(params["work_dir"])
+    video_path = Path(params["video_path"])
+    clips_dir.mkdir(parents=True, exist_ok=True)
+    published = {}
+
+    def publish_clip(clip: dict) -> dict | None:
+        """Moves a finished clip to the clips directory and returns its response entry."""
+        if clip["path"] not in published:
+            clip_path = Path(clip["path"])
+            if not clip_path.exists():
+                return None
+            # Give clip a unique name to avoid collisions
+            unique_name = f"{job_id}_{clip_path.name}"
+            shutil.move(str(clip_path), str(clips_dir / unique_name))
+            published[clip["path"]] = {
+                "download_url": f"/api/clips/{unique_name}",
+                "filename": unique_name,
+                "segments": clip["segments"],
+            }
+        return published[clip["path"]]
+
+    def record_event(event: dict) -> None:
+        try:
+            # Worker paths mean nothing to clients; publish the clip and send
+            # its download URL instead
+            if "clip" in event:
+                event["clip"] = publish_clip(event["clip"])
+            store.add_event(job_id, event)
+        except Exception as e:
+            # Progress reporting must never fail the run itself
+            logger.warning(f"[{job_id}] Could not record {event.get('stage')} event: {e}")
+
+    # on_event is called on the pipeline's event loop; a single writer
+    # thread keeps SQLite lock waits and clip moves off it, in event order
+    event_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="job-events")
+
+    def on_event(event: dict) -> None:
+        event_writer.submit(record_event, dict(event))
+
+    logger.info(f"[{job_id}] Starting pipeline...")
+    try:
+        try:
+            result = _get_worker_loop().run_until_complete(run_pipeline(**params, on_event=on_event))
+        finally:
+            # All events are written before the job is marked finished
+            event_writer.shutdown(wait=True)
+    except Exception as e:
+        # Clean up work directory on failure
+        shutil.rmtree(work_dir, ignore_errors=True)
+        # Re-raise as a plain exception: library exceptions (e.g. openai's)
+        # don't always survive pickling back to the server process, and a
+        # failed unpickle breaks the whole pool
+        raise RuntimeError(f"{type(e).__name__}: {e}") from None
+
+    # Clean up uploaded video (keep clips)
+    try:
+        os.remove(video_path)
+    except OSError:
+        pass
+
+    # Clips are normally published by on_event already
+    clips_response = [entry for entry in map(publish_clip, result.get("clips", [])) if entry is not None]
+
+    # Clean up the job work directory (audio, cache, etc.)
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+    logger.info(f"[{job_id}] Done. {len(clips_response)} clip(s) ready for download.")
+    return {
+        "status": result["status"],
+        "clips": clips_response,
+        "errors": result.get("errors", []),
+    }
@@ -1,11 +1,28 @@
 """
 Clips download route — GET /api/clips/{filename}
+
+Clips are served with validators and byte-range support, so players can
+seek without re-downloading and caches/CDNs can revalidate:
+
+- a strong ETag derived from the clip's content hash, plus Last-Modified;
+- If-None-Match / If-Modified-Since answered with 304 Not Modified;
+- single byte ranges (Range, honouring If-Range) answered with 206, and
+  unsatisfiable ones with 416.
+
+Full responses go through FileResponse, which hands the file to the server
+for zero-copy transfer where the ASGI server supports it.
 """
 
+import os
+import asyncio
+import hashlib
 import logging
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from functools import lru_cache
 from pathlib import Path
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
 
 logger = logging.getLogger(__name__)
 
@@ -14,9 +31,16 @@ router = APIRouter()
 # Directory where clips are stored
 CLIPS_DIR = Path("/tmp/longform_shorts/clipped")
 
+# Clip names are unique per job and never rewritten, but keep revalidation
+# possible in case one is regenerated under the same name
+CLIP_CACHE_CONTROL = "public, max-age=86400"
+
+# Ranged responses are read and sent in chunks of this size
+_RANGE_CHUNK_SIZE = 1024 * 1024
 
-@router.get("/clips/{filename}")
-async def download_clip(filename: str):
+
+@router.api_route("/clips/{filename}", methods=["GET", "HEAD"])
+async def download_clip(filename: str, request: Request):
     """
     Download a generated clip by filename.
     """
@@ -26,12 +50,131 @@ async def download_clip(filename: str):
 
     clip_path = CLIPS_DIR / filename
 
-    if not clip_path.exists():
+    try:
+        stat = clip_path.stat()
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail=f"Clip not found: {filename}")
 
-    logger.info(f"Serving clip: {filename}")
-    return FileResponse(
-        path=str(clip_path),
-        media_type="video/mp4",
-        filename=filename,
+    etag = await asyncio.to_thread(_clip_etag, str(clip_path), stat.st_size, stat.st_mtime_ns)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": format_datetime(datetime.fromtimestamp(int(stat.st_mtime), timezone.utc), usegmt=True),
+        "Cache-Control": CLIP_CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+    }
+
+    if _not_modified(request, etag, stat.st_mtime):
+        return Response(status_code=304, headers=headers)
+
+    byte_range = None
+    range_header = request.headers.get("range")
+    if range_header and _if_range_matches(request.headers.get("if-range"), etag, stat.st_mtime):
+        byte_range = _parse_range(range_header, stat.st_size)
+        if byte_range == "unsatisfiable":
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{stat.st_size}"})
+
+    if byte_range is None:
+        logger.info(f"Serving clip: {filename}")
+        return FileResponse(path=str(clip_path), media_type="video/mp4", filename=filename, headers=headers)
+
+    start, end = byte_range
+    logger.debug(f"Serving clip: {filename} bytes {start}-{end}")
+    headers.update({
+        "Content-Range": f"bytes {start}-{end}/{stat.st_size}",
+        "Content-Length": str(end - start + 1),
+    })
+    if request.method == "HEAD":
+        return Response(status_code=206, headers=headers, media_type="video/mp4")
+    return StreamingResponse(
+        _read_range(clip_path, start, end), status_code=206, headers=headers, media_type="video/mp4"
     )
+
+
+@lru_cache(maxsize=1024)
+def _clip_etag(path: str, size: int, mtime_ns: int) -> str:
+    """Strong ETag of a clip's content; memoized per (path, size, mtime)."""
+    hasher = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_RANGE_CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return f'"{hasher.hexdigest()}"'
+
+
+def _not_modified(request: Request, etag: str, mtime: float) -> bool:
+    """Whether the conditional headers allow a 304 (If-None-Match takes precedence)."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # Weak comparison, as RFC 9110 requires for If-None-Match
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or etag in tags
+
+    if_modified_since = _parse_http_date(request.headers.get("if-modified-since"))
+    return if_modified_since is not None and int(mtime) <= if_modified_since
+
+
+def _if_range_matches(if_range: str | None, etag: str, mtime: float) -> bool:
+    """Whether a Range request may be honoured given its If-Range validator."""
+    if if_range is None:
+        return True
+    if if_range.startswith('"'):
+        # Strong comparison
+        return if_range == etag
+    date = _parse_http_date(if_range)
+    return date is not None and int(mtime) <= date
+
+
+def _parse_http_date(value: str | None) -> int | None:
+    if not value:
+        return None
+    try:
+        return int(parsedate_to_datetime(value).timestamp())
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_range(header: str, size: int) -> tuple[int, int] | str | None:
+    """
+    Parses a Range header into an inclusive (start, end) byte range.
+
+    Returns None when the header should be ignored (malformed, or several
+    ranges, which are served as the full clip), and "unsatisfiable" when no
+    byte of the clip is in range.
+    """
+    unit, _, ranges = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in ranges:
+        return None
+    first, sep, last = ranges.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        else:
+            # Suffix range: the final N bytes
+            length = int(last)
+            if length == 0:
+                return "unsatisfiable"
+            start, end = max(0, size - length), size - 1
+    except ValueError:
+        return None
+    if start < 0 or end < start:
+        return None
+    if start >= size:
+        return "unsatisfiable"
+    return start, min(end, size - 1)
+
+
+async def _read_range(path: Path, start: int, end: int):
+    """Yields bytes start..end (inclusive) of *path*, reading off the event loop."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        offset = start
+        while offset <= end:
+            chunk = await asyncio.to_thread(os.pread, fd, min(_RANGE_CHUNK_SIZE, end - offset + 1), offset)
+            if not chunk:
+                break
+            yield chunk
+            offset += len(chunk)
+    finally:
+        os.close(fd)
@@ -1,18 +1,24 @@
 """
-Pipeline API route — POST /api/process-video
+Pipeline API routes — POST /api/process-video, POST /api/jobs,
+GET /api/jobs/{job_id}, GET /api/jobs/{job_id}/events
 
-Accepts video via file upload (multipart/form-data).
+Accepts video via file upload (multipart/form-data) and runs the pipeline
+as a background job on a pool of worker processes.
 """
 
-import os
+import json
 import uuid
 import shutil
+import asyncio
 import logging
 from pathlib import Path
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
-from scripts.pipeline import run_pipeline
+from scripts.audio_processor import publish_extracted_audio
+from server.ingest import ingest_upload
+from server.jobs import FINAL_STATUSES, JobQueue, JobStore, QueueFullError
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +27,27 @@ router = APIRouter()
 # Base directory for all temp processing files
 WORK_BASE = Path("/tmp/longform_shorts")
 
+# Persistent caches shared by all jobs (audio, transcriptions, matches);
+# job work directories are scratch space and deleted when a job ends
+CACHE_DIR = WORK_BASE / "cache"
+
+# Extracted audio, keyed by video content
+AUDIO_CACHE_DIR = CACHE_DIR / "audio"
+
+# Finished clips, served by the clips route
+CLIPS_DIR = WORK_BASE / "clipped"
+
+# Job records, shared with the worker processes
+job_store = JobStore(WORK_BASE / "jobs.sqlite3")
+job_queue = JobQueue(job_store)
+
+# Seconds between checks for new job events while streaming them
+EVENT_POLL_INTERVAL = 0.5
+
+# Seconds without events after which a keep-alive comment is sent, so
+# proxies don't close an idle event stream
+EVENT_KEEPALIVE_INTERVAL = 15.0
+
 
 class ClipResult(BaseModel):
     download_url: str
@@ -34,90 +61,249 @@ class ProcessVideoResponse(BaseModel):
     errors: list[str]
 
 
+class JobAcceptedResponse(BaseModel):
+    job_id: str
+    status: str
+    status_url: str
+    events_url: str
+
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    status: str
+    created_at: float
+    started_at: float | None
+    finished_at: float | None
+    result: ProcessVideoResponse | None
+    error: str | None
+
+
 @router.post("/process-video", response_model=ProcessVideoResponse)
-async def process_video(
-    video: UploadFile = File(..., description="Video file to process"),
-    n_answers: int = Form(default=1, ge=1, le=10, description="Number of highlight sets"),
-    model: str = Form(default="gpt-4o-mini", description="OpenAI model to use"),
-    temperature: float = Form(default=0.7, ge=0.0, le=2.0, description="LLM temperature"),
-):
+async def process_video(request: Request):
     """
     Upload a video file and extract highlight clips.
 
-    Returns download URLs for each generated clip.
+    Expects multipart/form-data with:
+        video: Video file to process
+        n_answers: Number of highlight sets (1-10, default 1)
+        model: OpenAI model to use (default gpt-4o-mini)
+        temperature: LLM temperature (0.0-2.0, default 0.7)
+        bypass_llm_cache: "true" to ask the LLM again instead of reusing
+                          cached responses for this transcript (default false)
+
+    The upload is ingested as it streams in (see server.ingest), so audio
+    extraction overlaps the transfer for streamable containers.  The work
+    runs as a background job (see POST /api/jobs); this endpoint waits for
+    it and returns download URLs for each generated clip.
+    """
+    job_id, task = await _accept_job(request)
+    job = await task
+
+    if job["status"] == "failed":
+        if job["result"] is not None:
+            raise HTTPException(status_code=400, detail=job["result"]["errors"])
+        raise HTTPException(status_code=500, detail=job["error"])
+    return job["result"]
+
+
+@router.post("/jobs", response_model=JobAcceptedResponse, status_code=202)
+async def create_job(request: Request):
+    """
+    Upload a video and queue it for processing; returns immediately.
+
+    Takes the same multipart/form-data as POST /api/process-video.  Follow
+    GET /api/jobs/{job_id}/events for progress, or poll GET /api/jobs/{job_id}
+    for the outcome.  Responds 429 while
+    MAX_PENDING_JOBS jobs are already pending.
+    """
+    job_id, _ = await _accept_job(request)
+    return {
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": f"/api/jobs/{job_id}",
+        "events_url": f"/api/jobs/{job_id}/events",
+    }
+
+
+@router.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job(job_id: str):
+    """
+    Status of a job, with its clips once it is done.
+    """
+    job = await asyncio.to_thread(job_store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+        "result": job["result"],
+        "error": job["error"],
+    }
+
+
+@router.get("/jobs/{job_id}/events")
+async def get_job_events(job_id: str, request: Request):
+    """
+    Server-sent event stream of a job's progress.
+
+    Each pipeline stage event (see scripts.pipeline._StageEvents) is sent
+    as a "progress" event; render events for finished highlight sets carry
+    the clip's download_url, so clips can be fetched before the job ends.
+    A final "end" event gives the job's status.  Reconnecting clients may
+    send Last-Event-ID to resume after the last event they received.
+    """
+    if await asyncio.to_thread(job_store.get, job_id) is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    last_event_id = request.headers.get("last-event-id", "")
+    after = int(last_event_id) if last_event_id.isdigit() else 0
+    return StreamingResponse(
+        _stream_job_events(job_id, after, request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _stream_job_events(job_id: str, after: int, request: Request):
+    """Yields the job's events in SSE format until the job finishes."""
+    idle = 0.0
+    while True:
+        # Workers write all events before the job is marked finished, so
+        # reading the status first guarantees none are missed below
+        job = await asyncio.to_thread(job_store.get, job_id)
+        events = await asyncio.to_thread(job_store.events, job_id, after)
+        for seq, event in events:
+            yield f"id: {seq}\nevent: progress\ndata: {json.dumps(event)}\n\n"
+            after = seq
+
+        if job["status"] in FINAL_STATUSES:
+            end = {"status": job["status"], "error": job["error"]}
+            yield f"event: end\ndata: {json.dumps(end)}\n\n"
+            return
+        if await request.is_disconnected():
+            return
+
+        idle = 0.0 if events else idle + EVENT_POLL_INTERVAL
+        if idle >= EVENT_KEEPALIVE_INTERVAL:
+            yield ": keep-alive\n\n"
+            idle = 0.0
+        await asyncio.sleep(EVENT_POLL_INTERVAL)
+
+
+async def _accept_job(request: Request) -> tuple[str, asyncio.Task]:
+    """
+    Admits a job, ingests its upload and queues it on the worker pool.
+
+    Returns:
+        (job_id, task resolving to the finished job record)
     """
-    # Create a unique work directory for this job
     job_id = uuid.uuid4().hex[:12]
+    try:
+        # Store calls may wait on workers' writes; keep them off the event loop
+        await asyncio.to_thread(job_store.reserve, job_id)
+    except QueueFullError as e:
+        logger.warning(f"[{job_id}] Rejected: {e}")
+        raise HTTPException(status_code=429, detail="Server busy, try again later", headers={"Retry-After": "30"})
+
+    # Create a unique work directory for this job
     work_dir = WORK_BASE / job_id
-    uploads_dir = work_dir / "uploads"
-    uploads_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        return job_id, await _ingest_job(job_id, request, work_dir)
+    except BaseException as e:
+        # Whatever went wrong, including the client disconnecting mid-upload
+        # (CancelledError), the reserved slot must be released
+        shutil.rmtree(work_dir, ignore_errors=True)
+        if isinstance(e, HTTPException):
+            error = str(e.detail)
+        elif isinstance(e, asyncio.CancelledError):
+            error = "Upload aborted"
+        else:
+            error = str(e) or type(e).__name__
+        # Shielded so a second cancellation can't skip the release
+        await asyncio.shield(asyncio.to_thread(job_store.mark_failed, job_id, error))
+        raise
 
-    # Save uploaded file
-    video_filename = video.filename or f"upload_{job_id}.mp4"
-    video_path = uploads_dir / video_filename
 
-    logger.info(f"[{job_id}] Receiving upload: {video_filename}")
+async def _ingest_job(job_id: str, request: Request, work_dir: Path) -> asyncio.Task:
+    """
+    Receives a reserved job's upload into *work_dir* and submits it.
 
-    try:
-        with open(video_path, "wb") as f:
-            shutil.copyfileobj(video.file, f)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to save uploaded file: {e}")
-    finally:
-        await video.close()
+    Returns:
+        Task resolving to the finished job record (see JobQueue.submit)
+    """
+    uploads_dir = work_dir / "uploads"
+    uploads_dir.mkdir(parents=True, exist_ok=True)
 
-    logger.info(f"[{job_id}] Upload saved ({video_path.stat().st_size / 1024 / 1024:.1f} MB). Starting pipeline...")
+    logger.info(f"[{job_id}] Receiving upload...")
 
-    # Run the pipeline
     try:
-        result = await run_pipeline(
-            video_path=str(video_path),
-            n_answers=n_answers,
-            model=model,
-            temperature=temperature,
-            work_dir=str(work_dir),
-        )
+        upload = await ingest_upload(request, uploads_dir, AUDIO_CACHE_DIR)
     except Exception as e:
-        logger.error(f"[{job_id}] Pipeline failed: {e}")
-        # Clean up work directory on failure
-        shutil.rmtree(work_dir, ignore_errors=True)
-        raise HTTPException(status_code=500, detail=str(e))
+        if isinstance(e, HTTPException):
+            raise
+        raise HTTPException(status_code=500, detail=f"Failed to save uploaded file: {e}") from e
 
-    # Clean up uploaded video (keep clips)
     try:
-        os.remove(video_path)
-    except OSError:
-        pass
+        n_answers = _form_number(upload.fields, "n_answers", int, 1, 1, 10)
+        model = upload.fields.get("model") or "gpt-4o-mini"
+        temperature = _form_number(upload.fields, "temperature", float, 0.7, 0.0, 2.0)
+        bypass_llm_cache = _form_bool(upload.fields, "bypass_llm_cache")
 
-    if result["status"] == "error" and not result["clips"]:
-        raise HTTPException(status_code=400, detail=result["errors"])
+        video_path = upload.video_path
+        audio_path = None
+        if upload.audio_path is not None:
+            try:
+                audio_path = await asyncio.to_thread(
+                    publish_extracted_audio, video_path, upload.audio_path, AUDIO_CACHE_DIR
+                )
+            except Exception as e:
+                # The job can still extract from the saved video
+                logger.warning(f"[{job_id}] Could not cache piped audio: {e}")
+                upload.audio_path.unlink(missing_ok=True)
+    except BaseException:
+        # Piped audio that never made it into the cache
+        if upload.audio_path is not None:
+            upload.audio_path.unlink(missing_ok=True)
+        raise
 
-    # Move clips to the shared clips directory and build download URLs
-    shared_clips_dir = WORK_BASE / "clipped"
-    shared_clips_dir.mkdir(parents=True, exist_ok=True)
+    logger.info(f"[{job_id}] Upload saved ({video_path.stat().st_size / 1024 / 1024:.1f} MB). Queueing job...")
 
-    clips_response = []
-    for clip in result.get("clips", []):
-        clip_path = Path(clip["path"])
-        if clip_path.exists():
-            # Give clip a unique name to avoid collisions
-            unique_name = f"{job_id}_{clip_path.name}"
-            dest = shared_clips_dir / unique_name
-            shutil.move(str(clip_path), str(dest))
+    return await job_queue.submit(job_id, {
+        "video_path": str(video_path),
+        "n_answers": n_answers,
+        "model": model,
+        "temperature": temperature,
+        "bypass_llm_cache": bypass_llm_cache,
+        "work_dir": str(work_dir),
+        "cache_dir": str(CACHE_DIR),
+        "audio_path": str(audio_path) if audio_path else None,
+        "clips_dir": str(CLIPS_DIR),
+    })
 
-            clips_response.append({
-                "download_url": f"/api/clips/{unique_name}",
-                "filename": unique_name,
-                "segments": clip["segments"],
-            })
 
-    # Clean up the job work directory (audio, cache, etc.)
-    shutil.rmtree(work_dir, ignore_errors=True)
+def _form_number(fields: dict[str, str], name: str, cast, default, minimum, maximum):
+    """Parses and range-checks a numeric form field, raising 422 when invalid."""
+    raw = fields.get(name)
+    if raw is None or raw == "":
+        return default
+    try:
+        value = cast(raw)
+    except ValueError:
+        raise HTTPException(status_code=422, detail=f"{name} must be a number")
+    if not minimum <= value <= maximum:
+        raise HTTPException(status_code=422, detail=f"{name} must be between {minimum} and {maximum}")
+    return value
 
-    logger.info(f"[{job_id}] Done. {len(clips_response)} clip(s) ready for download.")
 
-    return {
-        "status": result["status"],
-        "clips": clips_response,
-        "errors": result.get("errors", []),
-    }
+def _form_bool(fields: dict[str, str], name: str, default: bool = False) -> bool:
+    """Parses a boolean form field ("true"/"false", "1"/"0", ...), raising 422 when invalid."""
+    raw = (fields.get(name) or "").strip().lower()
+    if raw == "":
+        return default
+    if raw in ("1", "true", "yes", "on"):
+        return True
+    if raw in ("0", "false", "no", "off"):
+        return False
+    raise HTTPException(status_code=422, detail=f"{name} must be true or false")